@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from .. import schemas
+from ..archive import ArchiveError, import_archive, stream_archive
+from ..database import get_db
+from .common import get_active_project
+
+router = APIRouter(prefix="/api/archive", tags=["archive"])
+
+@router.get("/{project_id}")
+def export_archive(project_id: int, db: Session = Depends(get_db)):
+    """Выгрузка проекта в архив (NDJSON + gzip)"""
+    get_active_project(db, project_id)
+    
+    return StreamingResponse(stream_archive(project_id), media_type="application/gzip",
+                             headers={"Content-Disposition": f"attachment; filename=project_{project_id}.wdz"})
+
+@router.post("/import", response_model=schemas.Project)
+def import_project_archive(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Загрузка проекта из архива"""
+    try:
+        project = import_archive(db, file.file)
+    except ArchiveError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {e}")
+    
+    db.commit()
+    db.refresh(project)
+    return project
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+from .. import schemas
+from ..bom import get_portfolio_bom, get_project_bom
+from ..database import get_db
+from .common import get_active_project
+
+router = APIRouter(prefix="/api/bom", tags=["bom"])
+
+@router.get("/", response_model=schemas.BillOfMaterials)
+def get_portfolio(project_ids: List[int] = Query(...), db: Session = Depends(get_db)):
+    """Суммарная спецификация по нескольким проектам"""
+    return get_portfolio_bom(db, project_ids)
+
+@router.get("/project/{project_id}", response_model=schemas.BillOfMaterials)
+def get_project(project_id: int, db: Session = Depends(get_db)):
+    """Спецификация проекта: метраж кабеля по сечению и жильности, устройства по типам"""
+    get_active_project(db, project_id)
+    return get_project_bom(db, project_id)
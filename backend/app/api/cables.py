@@ -0,0 +1,35 @@
+import math
+from fastapi import APIRouter
+from typing import List
+from .. import schemas
+from ..cable_ratings import INSTALLATION_METHODS, allowed_current, suggest_section
+
+router = APIRouter(prefix="/api/cables", tags=["cables"])
+
+@router.get("/installation-methods", response_model=List[str])
+def get_installation_methods():
+    """Получить список поддерживаемых способов прокладки"""
+    return list(INSTALLATION_METHODS)
+
+@router.post("/suggest-section", response_model=List[schemas.CableSectionResult])
+def suggest_cable_sections(requests: List[schemas.CableSectionRequest]):
+    """Пакетный подбор сечений кабелей"""
+    results = []
+    for request in requests:
+        result = schemas.CableSectionResult(**request.dict())
+        try:
+            result.cable_section = suggest_section(
+                request.power, request.distance, request.installation_method, request.wire_count
+            )
+            result.allowed_current = allowed_current(
+                result.cable_section, request.installation_method, request.wire_count
+            )
+        except ValueError as e:
+            result.error = str(e)
+            # NaN и Infinity не представимы в JSON ответа
+            if not math.isfinite(request.power):
+                result.power = None
+            if not math.isfinite(request.distance):
+                result.distance = None
+        results.append(result)
+    return results
@@ -0,0 +1,21 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from .. import models
+
+def get_active_project(db: Session, project_id: int) -> models.Project:
+    """Проект, не помеченный на удаление; иначе 404.
+
+    Проекты с deleted_at очищаются в фоне, поэтому в них нельзя ни читать, ни добавлять данные.
+    """
+    project = db.query(models.Project).filter(models.Project.id == project_id, models.Project.deleted_at.is_(None)).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+def get_active_row(db: Session, model, row_id: int, detail: str):
+    """Строка модели проекта (элемент, связь, элемент щита) по id, если ее проект не помечен на удаление; иначе 404"""
+    row = db.query(model).join(models.Project, models.Project.id == model.project_id).filter(
+        model.id == row_id, models.Project.deleted_at.is_(None)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail=detail)
+    return row
@@ -1,17 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from .. import schemas, models
+from .. import schemas, models, journal, serialization
 from ..database import get_db
+from .common import get_active_project, get_active_row
 
 router = APIRouter(prefix="/api/connections", tags=["connections"])
 
 @router.post("/", response_model=schemas.Connection)
 def create_connection(connection: schemas.ConnectionCreate, db: Session = Depends(get_db)):
     # Проверка существования проекта
-    project = db.query(models.Project).filter(models.Project.id == connection.project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    get_active_project(db, connection.project_id)
     
     # Проверка существования элементов
     from_element = db.query(models.Element).filter(models.Element.id == connection.from_element_id).first()
@@ -25,31 +24,31 @@ def create_connection(connection: schemas.ConnectionCreate, db: Session = Depend
     
     db_connection = models.Connection(**connection.dict())
     db.add(db_connection)
+    db.flush()
+    journal.record(db, db_connection.project_id, "create_connection", [journal.inserted(db_connection)])
     db.commit()
     db.refresh(db_connection)
     return db_connection
 
 @router.get("/project/{project_id}", response_model=List[schemas.Connection])
 def get_connections_by_project(project_id: int, db: Session = Depends(get_db)):
-    connections = db.query(models.Connection).filter(models.Connection.project_id == project_id).all()
-    return connections
+    get_active_project(db, project_id)
+    statement = serialization.connections.select().where(models.Connection.project_id == project_id)
+    return serialization.connections.response(db, statement)
 
 @router.get("/{connection_id}", response_model=schemas.Connection)
 def get_connection(connection_id: int, db: Session = Depends(get_db)):
-    connection = db.query(models.Connection).filter(models.Connection.id == connection_id).first()
-    if not connection:
-        raise HTTPException(status_code=404, detail="Connection not found")
-    return connection
+    return get_active_row(db, models.Connection, connection_id, "Connection not found")
 
 @router.put("/{connection_id}", response_model=schemas.Connection)
 def update_connection(connection_id: int, connection_update: schemas.ConnectionUpdate, db: Session = Depends(get_db)):
-    db_connection = db.query(models.Connection).filter(models.Connection.id == connection_id).first()
-    if not db_connection:
-        raise HTTPException(status_code=404, detail="Connection not found")
+    db_connection = get_active_row(db, models.Connection, connection_id, "Connection not found")
     
     update_data = connection_update.dict(exclude_unset=True)
+    change = journal.updated(db_connection, update_data)
     for field, value in update_data.items():
         setattr(db_connection, field, value)
+    journal.record(db, db_connection.project_id, "update_connection", [change])
     
     db.commit()
     db.refresh(db_connection)
@@ -57,11 +56,11 @@ def update_connection(connection_id: int, connection_update: schemas.ConnectionU
 
 @router.delete("/{connection_id}")
 def delete_connection(connection_id: int, db: Session = Depends(get_db)):
-    db_connection = db.query(models.Connection).filter(models.Connection.id == connection_id).first()
-    if not db_connection:
-        raise HTTPException(status_code=404, detail="Connection not found")
+    db_connection = get_active_row(db, models.Connection, connection_id, "Connection not found")
     
+    change = journal.deleted(db_connection)
     db.delete(db_connection)
+    journal.record(db, db_connection.project_id, "delete_connection", [change])
     db.commit()
     return {"message": "Connection deleted"}
 
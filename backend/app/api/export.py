@@ -1,13 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from .. import models
 from ..database import get_db
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
+from .common import get_active_project
+from ..pdf_renderer import render_project_pdf
+from ..vector_export import stream_dxf, stream_svg
 from io import BytesIO
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill
@@ -16,93 +15,48 @@ router = APIRouter(prefix="/api/export", tags=["export"])
 
 @router.get("/pdf/{project_id}")
 def export_pdf(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    elements = db.query(models.Element).filter(models.Element.project_id == project_id).all()
-    connections = db.query(models.Connection).filter(models.Connection.project_id == project_id).all()
-    panel_elements = db.query(models.PanelElement).filter(models.PanelElement.project_id == project_id).all()
-    
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    
-    # Заголовок
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, height - 50, f"Проект: {project.name}")
-    
-    # Таблица элементов
-    y_pos = height - 100
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y_pos, "Элементы схемы:")
-    y_pos -= 20
-    
-    c.setFont("Helvetica", 10)
-    headers = ["ID", "Тип", "Название", "X", "Y"]
-    col_widths = [60, 80, 150, 50, 50]
-    x_start = 50
-    
-    # Заголовки таблицы
-    x = x_start
-    for i, header in enumerate(headers):
-        c.drawString(x, y_pos, header)
-        x += col_widths[i]
-    y_pos -= 15
-    
-    # Данные
-    for element in elements:
-        if y_pos < 100:
-            c.showPage()
-            y_pos = height - 50
-        c.drawString(x_start, y_pos, element.element_id)
-        c.drawString(x_start + col_widths[0], y_pos, element.type)
-        c.drawString(x_start + col_widths[0] + col_widths[1], y_pos, element.name)
-        c.drawString(x_start + col_widths[0] + col_widths[1] + col_widths[2], y_pos, f"{element.x:.2f}")
-        c.drawString(x_start + col_widths[0] + col_widths[1] + col_widths[2] + col_widths[3], y_pos, f"{element.y:.2f}")
-        y_pos -= 15
-    
-    # Таблица связей
-    c.showPage()
-    y_pos = height - 50
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y_pos, "Связи (кабели):")
-    y_pos -= 20
-    
-    c.setFont("Helvetica", 10)
-    headers = ["От", "К", "Сечение (мм²)", "Жил", "Длина (м)"]
-    col_widths = [60, 60, 80, 50, 80]
-    
-    x = x_start
-    for i, header in enumerate(headers):
-        c.drawString(x, y_pos, header)
-        x += col_widths[i]
-    y_pos -= 15
+    project = get_active_project(db, project_id)
+    
+    elements = db.query(
+        models.Element.id,
+        models.Element.element_id,
+        models.Element.type,
+        models.Element.name,
+        models.Element.x,
+        models.Element.y,
+    ).filter(models.Element.project_id == project_id).all()
+    connections = db.query(
+        models.Connection.from_element_id,
+        models.Connection.to_element_id,
+        models.Connection.cable_section,
+        models.Connection.wire_count,
+        models.Connection.length,
+    ).filter(models.Connection.project_id == project_id).all()
+    
+    content = render_project_pdf(project.name, project.floor_plan_svg, elements, connections)
+    
+    return Response(content=content, media_type="application/pdf", 
+                   headers={"Content-Disposition": f"attachment; filename=project_{project_id}.pdf"})
+
+@router.get("/svg/{project_id}")
+def export_svg(project_id: int, labels: bool = True, db: Session = Depends(get_db)):
+    """Чертеж проекта в SVG: план, трассы кабелей и обозначения элементов"""
+    get_active_project(db, project_id)
     
-    for connection in connections:
-        if y_pos < 100:
-            c.showPage()
-            y_pos = height - 50
-        from_elem = db.query(models.Element).filter(models.Element.id == connection.from_element_id).first()
-        to_elem = db.query(models.Element).filter(models.Element.id == connection.to_element_id).first()
-        c.drawString(x_start, y_pos, from_elem.element_id if from_elem else str(connection.from_element_id))
-        c.drawString(x_start + col_widths[0], y_pos, to_elem.element_id if to_elem else str(connection.to_element_id))
-        c.drawString(x_start + col_widths[0] + col_widths[1], y_pos, f"{connection.cable_section:.2f}")
-        c.drawString(x_start + col_widths[0] + col_widths[1] + col_widths[2], y_pos, str(connection.wire_count))
-        c.drawString(x_start + col_widths[0] + col_widths[1] + col_widths[2] + col_widths[3], y_pos, f"{connection.length:.2f}" if connection.length else "-")
-        y_pos -= 15
-    
-    c.save()
-    buffer.seek(0)
+    return StreamingResponse(stream_svg(project_id, labels), media_type="image/svg+xml",
+                             headers={"Content-Disposition": f"attachment; filename=project_{project_id}.svg"})
+
+@router.get("/dxf/{project_id}")
+def export_dxf(project_id: int, labels: bool = True, db: Session = Depends(get_db)):
+    """Чертеж проекта в DXF (R12): слои PLAN, CABLES, ELEMENTS, LABELS"""
+    get_active_project(db, project_id)
     
-    return Response(content=buffer.read(), media_type="application/pdf", 
-                   headers={"Content-Disposition": f"attachment; filename=project_{project_id}.pdf"})
+    return StreamingResponse(stream_dxf(project_id, labels), media_type="image/vnd.dxf",
+                             headers={"Content-Disposition": f"attachment; filename=project_{project_id}.dxf"})
 
 @router.get("/excel/{project_id}")
 def export_excel(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    get_active_project(db, project_id)
     
     elements = db.query(models.Element).filter(models.Element.project_id == project_id).all()
     connections = db.query(models.Connection).filter(models.Connection.project_id == project_id).all()
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+from .. import schemas
+from ..database import get_db
+from .common import get_active_project
+from ..spreadsheet_import import (
+    CONNECTIONS_SHEET, ELEMENTS_SHEET, SpreadsheetError, SpreadsheetImporter, import_workbook, iter_csv_rows,
+)
+
+router = APIRouter(prefix="/api/import", tags=["import"])
+
+@router.post("/excel/{project_id}", response_model=schemas.SpreadsheetImportResult)
+def import_excel(project_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Импорт листов "Элементы" и "Связи" из .xlsx в формате экспорта"""
+    get_active_project(db, project_id)
+    importer = SpreadsheetImporter(db, project_id)
+    try:
+        import_workbook(importer, file.file)
+    except SpreadsheetError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    db.commit()
+    return importer.result()
+
+@router.post("/csv/{project_id}", response_model=schemas.SpreadsheetImportResult)
+def import_csv(project_id: int, kind: str = Query(..., pattern="^(elements|connections)$"),
+               file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Импорт элементов или связей из CSV с колонками листа экспорта"""
+    get_active_project(db, project_id)
+    importer = SpreadsheetImporter(db, project_id)
+    try:
+        if kind == "elements":
+            importer.import_elements(iter_csv_rows(file.file), ELEMENTS_SHEET)
+        else:
+            importer.import_connections(iter_csv_rows(file.file), CONNECTIONS_SHEET)
+    except (SpreadsheetError, UnicodeDecodeError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {e}")
+    
+    db.commit()
+    return importer.result()
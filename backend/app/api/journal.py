@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from .. import schemas, journal
+from ..database import get_db
+from .common import get_active_project
+
+router = APIRouter(prefix="/api/journal", tags=["journal"])
+
+@router.get("/project/{project_id}", response_model=List[schemas.JournalEntry])
+def get_history(project_id: int, limit: int = 100, db: Session = Depends(get_db)):
+    """История операций проекта (последние сначала)"""
+    get_active_project(db, project_id)
+    return journal.history(db, project_id, limit)
+
+@router.post("/project/{project_id}/undo", response_model=schemas.JournalEntry)
+def undo(project_id: int, db: Session = Depends(get_db)):
+    """Отменить последнюю операцию"""
+    get_active_project(db, project_id)
+    entry = journal.undo(db, project_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Nothing to undo")
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+@router.post("/project/{project_id}/redo", response_model=schemas.JournalEntry)
+def redo(project_id: int, db: Session = Depends(get_db)):
+    """Повторить последнюю отмененную операцию"""
+    get_active_project(db, project_id)
+    entry = journal.redo(db, project_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Nothing to redo")
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+@router.post("/project/{project_id}/revert/{entry_id}")
+def revert(project_id: int, entry_id: int, db: Session = Depends(get_db)):
+    """Вернуть проект к состоянию после указанной операции"""
+    get_active_project(db, project_id)
+    if not journal.revert(db, project_id, entry_id):
+        raise HTTPException(status_code=404, detail="Journal entry not found")
+    db.commit()
+    return {"message": f"Project reverted to journal entry {entry_id}"}
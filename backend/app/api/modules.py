@@ -2,38 +2,41 @@ from fastapi import APIRouter, Depends
 from typing import List, Dict, Any
 from ..modules.module_manager import ModuleManager
 from ..modules.base_module import BaseModule
+from ..shared_state import get_shared_state
 
 router = APIRouter(prefix="/api/modules", tags=["modules"])
 
-# Глобальный менеджер модулей
-module_manager = ModuleManager()
+# Глобальный менеджер модулей; флаги включения и перезагрузки согласуются между процессами
+module_manager = ModuleManager(state=get_shared_state())
 
 @router.get("/", response_model=List[Dict[str, Any]])
 def get_modules():
     """Получить список всех загруженных модулей"""
-    modules = module_manager.get_all_modules()
-    return [
-        {
-            "name": name,
-            "info": module.get_info(),
-            "enabled": module.enabled,
-        }
-        for name, module in modules.items()
-    ]
+    result = []
+    for name in module_manager.get_all_modules():
+        # Экземпляр захватывается на время вызова, чтобы перезагрузка не очистила его раньше
+        with module_manager.use_module(name) as module:
+            if module is not None:
+                result.append({
+                    "name": name,
+                    "info": module.get_info(),
+                    "enabled": module.enabled,
+                })
+    return result
 
 @router.get("/{module_name}", response_model=Dict[str, Any])
 def get_module(module_name: str):
     """Получить информацию о конкретном модуле"""
-    module = module_manager.get_module(module_name)
-    if not module:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail="Module not found")
-    
-    return {
-        "name": module_name,
-        "info": module.get_info(),
-        "enabled": module.enabled,
-    }
+    with module_manager.use_module(module_name) as module:
+        if not module:
+            from fastapi import HTTPException
+            raise HTTPException(status_code=404, detail="Module not found")
+        
+        return {
+            "name": module_name,
+            "info": module.get_info(),
+            "enabled": module.enabled,
+        }
 
 @router.post("/{module_name}/reload")
 def reload_module(module_name: str):
@@ -48,22 +51,18 @@ def reload_module(module_name: str):
 @router.post("/{module_name}/enable")
 def enable_module(module_name: str):
     """Включить модуль"""
-    module = module_manager.get_module(module_name)
-    if not module:
+    if not module_manager.set_enabled(module_name, True):
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Module not found")
     
-    module.enabled = True
     return {"message": f"Module {module_name} enabled"}
 
 @router.post("/{module_name}/disable")
 def disable_module(module_name: str):
     """Отключить модуль"""
-    module = module_manager.get_module(module_name)
-    if not module:
+    if not module_manager.set_enabled(module_name, False):
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Module not found")
     
-    module.enabled = False
     return {"message": f"Module {module_name} disabled"}
 
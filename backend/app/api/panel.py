@@ -1,17 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from .. import schemas, models
+from .. import schemas, models, journal, serialization
 from ..database import get_db
+from .common import get_active_project, get_active_row
+from ..panel_layout import Rect, find_overlaps, layout_bounds, pack_rows
 
 router = APIRouter(prefix="/api/panel", tags=["panel"])
 
 @router.post("/", response_model=schemas.PanelElement)
 def create_panel_element(panel_element: schemas.PanelElementCreate, db: Session = Depends(get_db)):
     # Проверка существования проекта
-    project = db.query(models.Project).filter(models.Project.id == panel_element.project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    get_active_project(db, panel_element.project_id)
     
     # Проверка существования элемента
     element = db.query(models.Element).filter(models.Element.id == panel_element.element_id).first()
@@ -23,31 +23,81 @@ def create_panel_element(panel_element: schemas.PanelElementCreate, db: Session
     
     db_panel_element = models.PanelElement(**panel_element.dict())
     db.add(db_panel_element)
+    db.flush()
+    journal.record(db, db_panel_element.project_id, "create_panel_element", [journal.inserted(db_panel_element)])
     db.commit()
     db.refresh(db_panel_element)
     return db_panel_element
 
 @router.get("/project/{project_id}", response_model=List[schemas.PanelElement])
 def get_panel_elements_by_project(project_id: int, db: Session = Depends(get_db)):
-    panel_elements = db.query(models.PanelElement).filter(models.PanelElement.project_id == project_id).all()
-    return panel_elements
+    get_active_project(db, project_id)
+    statement = serialization.panel_elements.select().where(models.PanelElement.project_id == project_id)
+    return serialization.panel_elements.response(db, statement)
+
+@router.post("/project/{project_id}/layout", response_model=schemas.PanelLayout)
+def auto_layout_panel(project_id: int, layout_request: schemas.PanelLayoutRequest, db: Session = Depends(get_db)):
+    """Автоматическая раскладка всех элементов щита проекта по рядам DIN-рейки"""
+    get_active_project(db, project_id)
+    
+    rows = db.query(
+        models.PanelElement.id,
+        models.PanelElement.element_id,
+        models.PanelElement.position_x,
+        models.PanelElement.position_y,
+        models.PanelElement.width,
+        models.PanelElement.height,
+    ).filter(models.PanelElement.project_id == project_id).all()
+    element_ids = {row.id: row.element_id for row in rows}
+    
+    current = [Rect(row.id, row.position_x, row.position_y, row.width, row.height) for row in rows]
+    overlaps = find_overlaps(current)
+    placed, row_count = pack_rows(current, layout_request.row_width, layout_request.gap, layout_request.row_gap)
+    
+    if layout_request.apply and placed:
+        mappings = [{"id": rect.id, "position_x": rect.x, "position_y": rect.y} for rect in placed]
+        rows_by_id = {row.id: row for row in rows}
+        db.bulk_update_mappings(models.PanelElement, mappings)
+        journal.record(db, project_id, "auto_layout_panel", [
+            journal.updated(rows_by_id[mapping["id"]], {"position_x": mapping["position_x"], "position_y": mapping["position_y"]},
+                            table=models.PanelElement.__tablename__)
+            for mapping in mappings
+        ])
+        db.commit()
+    
+    bounds = layout_bounds(placed)
+    return schemas.PanelLayout(
+        rows=row_count,
+        width=bounds["width"],
+        height=bounds["height"],
+        elements=[
+            schemas.PanelElement(
+                id=rect.id,
+                project_id=project_id,
+                element_id=element_ids[rect.id],
+                position_x=rect.x,
+                position_y=rect.y,
+                width=rect.width,
+                height=rect.height,
+            )
+            for rect in placed
+        ],
+        overlaps=overlaps,
+    )
 
 @router.get("/{panel_element_id}", response_model=schemas.PanelElement)
 def get_panel_element(panel_element_id: int, db: Session = Depends(get_db)):
-    panel_element = db.query(models.PanelElement).filter(models.PanelElement.id == panel_element_id).first()
-    if not panel_element:
-        raise HTTPException(status_code=404, detail="Panel element not found")
-    return panel_element
+    return get_active_row(db, models.PanelElement, panel_element_id, "Panel element not found")
 
 @router.put("/{panel_element_id}", response_model=schemas.PanelElement)
 def update_panel_element(panel_element_id: int, panel_element_update: schemas.PanelElementUpdate, db: Session = Depends(get_db)):
-    db_panel_element = db.query(models.PanelElement).filter(models.PanelElement.id == panel_element_id).first()
-    if not db_panel_element:
-        raise HTTPException(status_code=404, detail="Panel element not found")
+    db_panel_element = get_active_row(db, models.PanelElement, panel_element_id, "Panel element not found")
     
     update_data = panel_element_update.dict(exclude_unset=True)
+    change = journal.updated(db_panel_element, update_data)
     for field, value in update_data.items():
         setattr(db_panel_element, field, value)
+    journal.record(db, db_panel_element.project_id, "update_panel_element", [change])
     
     db.commit()
     db.refresh(db_panel_element)
@@ -55,11 +105,11 @@ def update_panel_element(panel_element_id: int, panel_element_update: schemas.Pa
 
 @router.delete("/{panel_element_id}")
 def delete_panel_element(panel_element_id: int, db: Session = Depends(get_db)):
-    db_panel_element = db.query(models.PanelElement).filter(models.PanelElement.id == panel_element_id).first()
-    if not db_panel_element:
-        raise HTTPException(status_code=404, detail="Panel element not found")
+    db_panel_element = get_active_row(db, models.PanelElement, panel_element_id, "Panel element not found")
     
+    change = journal.deleted(db_panel_element)
     db.delete(db_panel_element)
+    journal.record(db, db_panel_element.project_id, "delete_panel_element", [change])
     db.commit()
     return {"message": "Panel element deleted"}
 
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends
+from sqlalchemy import Integer, column, delete, func, insert, literal, select, table, text
 from sqlalchemy.orm import Session
-from typing import List
-from .. import schemas, models
+from typing import List, Optional
+from .. import schemas, models, journal, serialization
 from ..database import get_db
+from .common import get_active_project
+from ..project_deletion import delete_project_rows, purge_project
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
@@ -12,60 +15,138 @@ def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)
     db.add(db_project)
     db.commit()
     db.refresh(db_project)
-    # Преобразуем integer в boolean
-    db_project.floor_plan_locked = bool(db_project.floor_plan_locked)
-    db_project.elements_locked = bool(db_project.elements_locked)
     return db_project
 
 @router.get("/", response_model=List[schemas.Project])
 def get_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    projects = db.query(models.Project).offset(skip).limit(limit).all()
-    # Преобразуем integer в boolean
-    for project in projects:
-        project.floor_plan_locked = bool(project.floor_plan_locked)
-        project.elements_locked = bool(project.elements_locked)
-    return projects
+    statement = serialization.projects.select().where(models.Project.deleted_at.is_(None)).offset(skip).limit(limit)
+    return serialization.projects.response(db, statement)
 
 @router.get("/{project_id}", response_model=schemas.Project)
 def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    # Преобразуем integer в boolean
-    project.floor_plan_locked = bool(project.floor_plan_locked)
-    project.elements_locked = bool(project.elements_locked)
+    project = get_active_project(db, project_id)
     return project
 
 @router.put("/{project_id}", response_model=schemas.Project)
 def update_project(project_id: int, project_update: schemas.ProjectUpdate, db: Session = Depends(get_db)):
-    db_project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    db_project = get_active_project(db, project_id)
     
     update_data = project_update.dict(exclude_unset=True)
-    # Конвертируем boolean в integer для SQLite
-    if 'floor_plan_locked' in update_data:
-        update_data['floor_plan_locked'] = 1 if update_data['floor_plan_locked'] else 0
-    if 'elements_locked' in update_data:
-        update_data['elements_locked'] = 1 if update_data['elements_locked'] else 0
-    
+    change = journal.updated(db_project, update_data)
     for field, value in update_data.items():
         setattr(db_project, field, value)
+    journal.record(db, project_id, "update_project", [change])
     
     db.commit()
     db.refresh(db_project)
-    # Преобразуем integer в boolean
-    db_project.floor_plan_locked = bool(db_project.floor_plan_locked)
-    db_project.elements_locked = bool(db_project.elements_locked)
     return db_project
 
 @router.delete("/{project_id}")
-def delete_project(project_id: int, db: Session = Depends(get_db)):
-    db_project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Project not found")
+def delete_project(project_id: int, background_tasks: BackgroundTasks, background: bool = False,
+                   db: Session = Depends(get_db)):
+    """Удаление проекта.
+
+    По умолчанию строки удаляются сразу, по одному DELETE на таблицу. С background=true
+    проект помечается удаленным и очищается порциями в фоне.
+    """
+    db_project = get_active_project(db, project_id)
+    
+    if background:
+        db_project.deleted_at = func.now()
+        db.commit()
+        background_tasks.add_task(purge_project, project_id)
+        return {"message": "Project scheduled for deletion"}
     
-    db.delete(db_project)
+    db.expunge(db_project)
+    delete_project_rows(db, project_id)
     db.commit()
     return {"message": "Project deleted"}
 
+# Временная таблица соответствия старых и новых id элементов при копировании проекта
+ELEMENT_ID_MAP_DDL = "CREATE TEMP TABLE IF NOT EXISTS element_id_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)"
+element_id_map = table("element_id_map", column("old_id", Integer), column("new_id", Integer))
+
+def _copy_project_children(db: Session, source_id: int, target_id: int):
+    """Копирует элементы, связи и элементы щита одним INSERT ... SELECT на таблицу.
+
+    Новые id элементов назначаются явно со сдвигом за наибольший выданный id; соответствие
+    старых и новых id хранится во временной таблице element_id_map и используется
+    для пересчета ссылок в связях и элементах щита.
+    """
+    element = models.Element.__table__
+    connection = models.Connection.__table__
+    panel_element = models.PanelElement.__table__
+    
+    db.execute(text(ELEMENT_ID_MAP_DDL))
+    db.execute(delete(element_id_map))
+    
+    max_id = journal.max_issued_id(db, models.Element)
+    min_id = db.execute(select(func.min(element.c.id)).where(element.c.project_id == source_id)).scalar()
+    if min_id is None:
+        return
+    offset = max_id - min_id + 1
+    
+    db.execute(insert(element_id_map).from_select(
+        ["old_id", "new_id"],
+        select(element.c.id, element.c.id + offset).where(element.c.project_id == source_id)
+    ))
+    id_map = element_id_map.alias("id_map")
+    from_map = element_id_map.alias("from_map")
+    to_map = element_id_map.alias("to_map")
+    
+    db.execute(insert(element).from_select(
+        ["id", "project_id", "element_id", "type", "name", "x", "y", "properties"],
+        select(
+            id_map.c.new_id, literal(target_id), element.c.element_id, element.c.type,
+            element.c.name, element.c.x, element.c.y, element.c.properties,
+        ).join(id_map, id_map.c.old_id == element.c.id)
+        .where(element.c.project_id == source_id)
+        .order_by(element.c.id)
+    ))
+    
+    db.execute(insert(connection).from_select(
+        ["project_id", "from_element_id", "to_element_id", "cable_section", "wire_count", "length"],
+        select(
+            literal(target_id), from_map.c.new_id, to_map.c.new_id,
+            connection.c.cable_section, connection.c.wire_count, connection.c.length,
+        ).join(from_map, from_map.c.old_id == connection.c.from_element_id)
+        .join(to_map, to_map.c.old_id == connection.c.to_element_id)
+        .where(connection.c.project_id == source_id)
+        .order_by(connection.c.id)
+    ))
+    
+    db.execute(insert(panel_element).from_select(
+        ["project_id", "element_id", "position_x", "position_y", "width", "height"],
+        select(
+            literal(target_id), id_map.c.new_id, panel_element.c.position_x,
+            panel_element.c.position_y, panel_element.c.width, panel_element.c.height,
+        ).join(id_map, id_map.c.old_id == panel_element.c.element_id)
+        .where(panel_element.c.project_id == source_id)
+        .order_by(panel_element.c.id)
+    ))
+    
+    db.execute(delete(element_id_map))
+
+@router.post("/{project_id}/duplicate", response_model=schemas.Project)
+def duplicate_project(project_id: int, duplicate: Optional[schemas.ProjectDuplicate] = None, db: Session = Depends(get_db)):
+    """Создает копию проекта со всеми элементами, связями и элементами щита"""
+    source = get_active_project(db, project_id)
+    
+    name = duplicate.name if duplicate and duplicate.name else f"{source.name} (копия)"
+    db_project = models.Project(
+        name=name,
+        scale=source.scale,
+        floor_plan_image=source.floor_plan_image,
+        floor_plan_svg=source.floor_plan_svg,
+        floor_plan_locked=source.floor_plan_locked,
+        elements_locked=source.elements_locked,
+        active_layer=source.active_layer,
+    )
+    db.add(db_project)
+    db.flush()
+    
+    _copy_project_children(db, project_id, db_project.id)
+    
+    db.commit()
+    db.refresh(db_project)
+    return db_project
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from .. import schemas, models
+from ..database import get_db
+from .common import get_active_project
+from ..geometry import Rect, gap, grid_point_pairs, overlap, sweep_pairs
+
+router = APIRouter(prefix="/api/validation", tags=["validation"])
+
+@router.get("/project/{project_id}", response_model=schemas.ProjectValidation)
+def validate_project(project_id: int, panel_clearance: float = 0.0, element_clearance: float = 10.0,
+                     db: Session = Depends(get_db)):
+    """Проверка перекрытий модулей щита и минимальных расстояний между элементами.
+
+    panel_clearance - минимальный зазор между модулями щита,
+    element_clearance - минимальное расстояние между элементами на плане.
+    """
+    get_active_project(db, project_id)
+    
+    panel_rects = [
+        Rect(*row)
+        for row in db.query(
+            models.PanelElement.id,
+            models.PanelElement.position_x,
+            models.PanelElement.position_y,
+            models.PanelElement.width,
+            models.PanelElement.height,
+        ).filter(models.PanelElement.project_id == project_id)
+    ]
+    element_points = [
+        Rect(row.id, row.x, row.y, 0.0, 0.0)
+        for row in db.query(models.Element.id, models.Element.x, models.Element.y)
+        .filter(models.Element.project_id == project_id)
+    ]
+    
+    result = schemas.ProjectValidation()
+    for a, b in sweep_pairs(panel_rects, panel_clearance):
+        first_id, second_id = min(a.id, b.id), max(a.id, b.id)
+        if overlap(a, b):
+            result.panel_overlaps.append((first_id, second_id))
+            continue
+        distance = gap(a, b)
+        if distance < panel_clearance:
+            result.panel_clearance_violations.append(
+                schemas.ClearanceViolation(first_id=first_id, second_id=second_id, distance=distance)
+            )
+    
+    if element_clearance > 0:
+        for a, b in grid_point_pairs(element_points, element_clearance):
+            distance = gap(a, b)
+            if distance < element_clearance:
+                result.element_clearance_violations.append(
+                    schemas.ClearanceViolation(first_id=min(a.id, b.id), second_id=max(a.id, b.id), distance=distance)
+                )
+    
+    return result
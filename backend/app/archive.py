@@ -0,0 +1,228 @@
+"""
+Собственный формат архива проекта: записи NDJSON (по одному JSON-объекту на строку), сжатые gzip.
+
+Порядок записей: header, project, plan, element..., connection..., panel_element...
+Элементы записываются по возрастанию id, ссылки связей и элементов щита указывают на id из архива.
+"""
+import gzip
+import json
+import zlib
+from typing import Any, BinaryIO, Dict, Iterator, List
+
+from sqlalchemy import and_, insert, select
+from sqlalchemy.orm import Session
+
+from . import journal, models
+from .database import SessionLocal
+
+ARCHIVE_FORMAT = "wiring-designer-archive"
+ARCHIVE_VERSION = 1
+BATCH_SIZE = 5000
+GZIP_MAGIC = b"\x1f\x8b"
+
+PROJECT_FIELDS = ["name", "scale", "floor_plan_locked", "elements_locked", "active_layer"]
+PLAN_FIELDS = ["floor_plan_svg", "floor_plan_image"]
+ELEMENT_FIELDS = ["id", "element_id", "type", "name", "x", "y", "properties"]
+CONNECTION_FIELDS = ["from_element_id", "to_element_id", "cable_section", "wire_count", "length"]
+PANEL_ELEMENT_FIELDS = ["element_id", "position_x", "position_y", "width", "height"]
+# Обязательные (NOT NULL) поля записей
+REQUIRED_FIELDS = {
+    "project": ["name"],
+    "element": ["id", "element_id", "type", "name", "x", "y"],
+    "connection": ["from_element_id", "to_element_id", "cable_section", "wire_count"],
+    "panel_element": PANEL_ELEMENT_FIELDS,
+}
+
+
+class ArchiveError(ValueError):
+    """Ошибка формата архива"""
+
+
+def _record(record_type: str, data: Dict[str, Any]) -> bytes:
+    return json.dumps({"type": record_type, "data": data}, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _iter_rows(db: Session, model, fields: List[str], project_id: int) -> Iterator[Dict[str, Any]]:
+    table = model.__table__
+    statement = (
+        select(*(table.c[field] for field in fields))
+        .where(table.c.project_id == project_id)
+        .order_by(table.c.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for row in db.execute(statement):
+        yield dict(row._mapping)
+
+
+def iter_archive_records(db: Session, project: models.Project) -> Iterator[bytes]:
+    """Перебирает строки архива проекта (без сжатия)"""
+    yield _record("header", {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION})
+    yield _record("project", {field: getattr(project, field) for field in PROJECT_FIELDS})
+    yield _record("plan", {field: getattr(project, field) for field in PLAN_FIELDS})
+    for record_type, model, fields in (
+        ("element", models.Element, ELEMENT_FIELDS),
+        ("connection", models.Connection, CONNECTION_FIELDS),
+        ("panel_element", models.PanelElement, PANEL_ELEMENT_FIELDS),
+    ):
+        for row in _iter_rows(db, model, fields, project.id):
+            yield _record(record_type, row)
+
+
+def stream_archive(project_id: int) -> Iterator[bytes]:
+    """Потоково формирует gzip-архив проекта.
+
+    Использует собственную сессию: генератор выполняется уже после выхода из обработчика запроса.
+    """
+    db = SessionLocal()
+    try:
+        project = db.query(models.Project).filter(models.Project.id == project_id).first()
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 - контейнер gzip
+        buffer = []
+        size = 0
+        for line in iter_archive_records(db, project):
+            buffer.append(line)
+            size += len(line)
+            if size >= 1 << 16:
+                chunk = compressor.compress(b"".join(buffer))
+                buffer, size = [], 0
+                if chunk:
+                    yield chunk
+        yield compressor.compress(b"".join(buffer)) + compressor.flush()
+    finally:
+        db.close()
+
+
+def _open_lines(fileobj: BinaryIO) -> Iterator[bytes]:
+    """Строки архива; поддерживается как gzip, так и несжатый NDJSON"""
+    head = fileobj.read(2)
+    fileobj.seek(0)
+    stream = gzip.GzipFile(fileobj=fileobj, mode="rb") if head == GZIP_MAGIC else fileobj
+    try:
+        for line in stream:
+            if line.strip():
+                yield line
+    except (OSError, EOFError, zlib.error) as e:
+        raise ArchiveError(f"Corrupted archive: {e}")
+
+
+def import_archive(db: Session, fileobj: BinaryIO) -> models.Project:
+    """Импортирует проект из архива пакетными вставками.
+
+    Новые id элементов назначаются со сдвигом за наибольший выданный id, поэтому ссылки
+    связей и элементов щита пересчитываются без хранения таблицы соответствия в памяти.
+    Ссылки на элементы, отсутствующие в архиве, проверяются после вставки запросом к БД.
+    Транзакцию фиксирует вызывающий код и откатывает при ArchiveError.
+    """
+    project = None
+    offset = None
+    last_element_id = None
+    batch: List[Dict[str, Any]] = []
+    batch_model = None
+    stage = 0
+    stages = {"header": 0, "project": 1, "plan": 2, "element": 3, "connection": 4, "panel_element": 5}
+
+    def flush():
+        nonlocal batch
+        if batch:
+            db.execute(insert(batch_model.__table__), batch)
+            batch = []
+
+    for line_number, line in enumerate(_open_lines(fileobj), start=1):
+        try:
+            record = json.loads(line)
+            record_type, data = record["type"], record["data"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ArchiveError(f"Line {line_number}: invalid record ({e})")
+        if record_type not in stages:
+            raise ArchiveError(f"Line {line_number}: unknown record type '{record_type}'")
+        if stages[record_type] < stage:
+            raise ArchiveError(f"Line {line_number}: record '{record_type}' is out of order")
+        if record_type == "project" and project is not None:
+            raise ArchiveError(f"Line {line_number}: archive must contain a single project record")
+        stage = stages[record_type]
+
+        if not isinstance(data, dict):
+            raise ArchiveError(f"Line {line_number}: invalid {record_type} record")
+        missing = [field for field in REQUIRED_FIELDS.get(record_type, []) if data.get(field) is None]
+        if missing:
+            raise ArchiveError(f"Line {line_number}: {record_type} record is missing {', '.join(missing)}")
+
+        if record_type == "header":
+            version = data.get("version", 0)
+            if (data.get("format") != ARCHIVE_FORMAT or not isinstance(version, int) or isinstance(version, bool)
+                    or version > ARCHIVE_VERSION):
+                raise ArchiveError("Unsupported archive format or version")
+            continue
+        if record_type == "project":
+            project = models.Project(**{field: data.get(field) for field in PROJECT_FIELDS if field in data})
+            db.add(project)
+            db.flush()
+            continue
+        if project is None:
+            raise ArchiveError(f"Line {line_number}: '{record_type}' record before project record")
+        if record_type == "plan":
+            for field in PLAN_FIELDS:
+                setattr(project, field, data.get(field))
+            db.flush()
+            continue
+
+        try:
+            if record_type == "element":
+                element_id = int(data["id"])
+                if offset is None:
+                    max_id = journal.max_issued_id(db, models.Element)
+                    offset = max_id + 1 - element_id
+                elif element_id <= last_element_id:
+                    raise ArchiveError(f"Line {line_number}: element ids must be strictly increasing")
+                last_element_id = element_id
+                row = {field: data[field] for field in ELEMENT_FIELDS if field != "properties"}
+                row["id"] = element_id + offset
+                row["properties"] = data.get("properties") or {}
+                model = models.Element
+            else:
+                reference_fields = ["from_element_id", "to_element_id"] if record_type == "connection" else ["element_id"]
+                fields = CONNECTION_FIELDS if record_type == "connection" else PANEL_ELEMENT_FIELDS
+                row = {field: data.get(field) for field in fields}
+                if offset is None:
+                    raise ArchiveError(f"Line {line_number}: {record_type} record refers to elements, but the archive has none")
+                for field in reference_fields:
+                    row[field] = int(data[field]) + offset
+                model = models.Connection if record_type == "connection" else models.PanelElement
+        except (KeyError, TypeError, ValueError) as e:
+            if isinstance(e, ArchiveError):
+                raise
+            raise ArchiveError(f"Line {line_number}: invalid {record_type} record ({e})")
+
+        if model is not batch_model:
+            flush()
+            batch_model = model
+        row["project_id"] = project.id
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            flush()
+
+    flush()
+    if project is None:
+        raise ArchiveError("Archive does not contain a project record")
+    _check_references(db, project.id, offset)
+    return project
+
+
+def _check_references(db: Session, project_id: int, offset: int):
+    """Проверяет, что связи и элементы щита ссылаются только на элементы импортированного проекта"""
+    element = models.Element.__table__
+    for record_type, model, fields in (
+        ("connection", models.Connection, ["from_element_id", "to_element_id"]),
+        ("panel_element", models.PanelElement, ["element_id"]),
+    ):
+        table = model.__table__
+        for field in fields:
+            target = element.alias()
+            reference = db.execute(
+                select(table.c[field])
+                .outerjoin(target, and_(target.c.id == table.c[field], target.c.project_id == project_id))
+                .where(table.c.project_id == project_id, target.c.id.is_(None))
+                .limit(1)
+            ).scalar()
+            if reference is not None:
+                raise ArchiveError(f"{record_type} {field} {reference - offset} is not an element of the archive")
@@ -0,0 +1,84 @@
+"""
+Спецификация (ведомость материалов): метраж кабеля по сечению и жильности, количество устройств по типам.
+Агрегаты считаются в SQL; для одного проекта результат сохраняется для текущей ревизии.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import Float, Integer, String, case, func, literal, null, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+from .revisions import get_revision
+
+
+def _aggregate(db: Session, project_filter) -> Dict[str, Any]:
+    """Считает кабели и устройства одним запросом UNION ALL.
+
+    project_filter - выражение над колонкой project_id (например, == id или IN (...)).
+    """
+    connection = models.Connection.__table__
+    element = models.Element.__table__
+    cables = select(
+        literal("cable").label("kind"),
+        connection.c.cable_section.label("cable_section"),
+        connection.c.wire_count.label("wire_count"),
+        null().cast(String).label("type"),
+        func.count().label("count"),
+        func.coalesce(func.sum(connection.c.length), 0.0).label("total_length"),
+        func.sum(case((connection.c.length.is_(None), 1), else_=0)).label("unmeasured_count"),
+    ).where(project_filter(connection.c.project_id)).group_by(connection.c.cable_section, connection.c.wire_count)
+    devices = select(
+        literal("device").label("kind"),
+        null().cast(Float),
+        null().cast(Integer),
+        element.c.type,
+        func.count(),
+        null().cast(Float),
+        null().cast(Integer),
+    ).where(project_filter(element.c.project_id)).group_by(element.c.type)
+
+    result: Dict[str, List[Dict[str, Any]]] = {"cables": [], "devices": []}
+    for row in db.execute(union_all(cables, devices)):
+        if row.kind == "cable":
+            result["cables"].append({
+                "cable_section": row.cable_section,
+                "wire_count": row.wire_count,
+                "count": row.count,
+                "total_length": round(row.total_length or 0.0, 3),
+                "unmeasured_count": row.unmeasured_count or 0,
+            })
+        else:
+            result["devices"].append({"type": row.type, "count": row.count})
+    result["cables"].sort(key=lambda c: (c["cable_section"], c["wire_count"]))
+    result["devices"].sort(key=lambda d: d["type"])
+    result["total_cable_length"] = round(sum(c["total_length"] for c in result["cables"]), 3)
+    return result
+
+
+def get_project_bom(db: Session, project_id: int) -> Dict[str, Any]:
+    """Спецификация проекта; пересчитывается только при смене ревизии"""
+    revision = get_revision(db, project_id)
+    cache = db.get(models.BomCache, project_id)
+    if cache is not None and cache.revision == revision:
+        data = cache.data
+    else:
+        data = _aggregate(db, lambda column: column == project_id)
+        if cache is None:
+            db.add(models.BomCache(project_id=project_id, revision=revision, data=data))
+        else:
+            cache.revision = revision
+            cache.data = data
+        try:
+            db.commit()
+        except IntegrityError:
+            # Параллельный запрос уже сохранил спецификацию; рассчитанный результат тот же
+            db.rollback()
+    return {"project_ids": [project_id], "revision": revision, **data}
+
+
+def get_portfolio_bom(db: Session, project_ids: List[int]) -> Dict[str, Any]:
+    """Суммарная спецификация по нескольким проектам"""
+    active = select(models.Project.id).where(models.Project.id.in_(project_ids), models.Project.deleted_at.is_(None))
+    existing = sorted(db.execute(active).scalars())
+    return {"project_ids": existing, "revision": None, **_aggregate(db, lambda column: column.in_(active))}
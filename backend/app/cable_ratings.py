@@ -0,0 +1,101 @@
+"""
+Таблицы допустимых длительных токов для медных проводников (ПУЭ, табл. 1.3.4 и 1.3.6)
+и подбор сечения кабеля по мощности, длине линии и способу прокладки
+"""
+import math
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Tuple
+
+# Номинальное напряжение сети, В
+NOMINAL_VOLTAGE = 220.0
+# Удельное сопротивление меди, Ом·мм²/м
+COPPER_RESISTIVITY = 0.0175
+# Допустимая потеря напряжения в линии (доля от номинального)
+MAX_VOLTAGE_DROP = 0.05
+# Минимальное сечение медных жил для групповых сетей, мм²
+MIN_SECTION = 1.5
+
+# Способы прокладки
+INSTALLATION_OPEN = "open"  # Одножильные провода, проложенные открыто
+INSTALLATION_PIPE = "pipe"  # Одножильные провода в одной трубе
+INSTALLATION_CABLE = "cable"  # Многожильный кабель в трубе или скрыто
+INSTALLATION_GROUND = "ground"  # Многожильный кабель в земле
+
+SECTIONS = (1.0, 1.5, 2.5, 4.0, 6.0, 10.0, 16.0, 25.0, 35.0, 50.0)
+
+# (способ прокладки, количество жил) -> допустимый ток, А, для каждого сечения из SECTIONS.
+# Для открытой прокладки количество жил не влияет на ток (ключ 1).
+_RAW_RATINGS: Dict[Tuple[str, int], Tuple[float | None, ...]] = {
+    (INSTALLATION_OPEN, 1): (17, 23, 30, 41, 50, 80, 100, 140, 170, 215),
+    (INSTALLATION_PIPE, 2): (16, 19, 27, 38, 46, 70, 85, 115, 135, 185),
+    (INSTALLATION_PIPE, 3): (15, 17, 25, 35, 42, 60, 80, 100, 125, 170),
+    (INSTALLATION_PIPE, 4): (14, 16, 25, 30, 40, 50, 75, 90, 115, 150),
+    (INSTALLATION_CABLE, 2): (15, 18, 25, 32, 40, 55, 80, 100, 125, 160),
+    (INSTALLATION_CABLE, 3): (14, 15, 21, 27, 34, 50, 70, 85, 100, 135),
+    (INSTALLATION_GROUND, 2): (None, 33, 44, 55, 70, 105, 135, 175, 210, 265),
+    (INSTALLATION_GROUND, 3): (None, 27, 38, 49, 60, 90, 115, 150, 180, 225),
+}
+
+
+def _build_table() -> Dict[Tuple[str, int], Tuple[Tuple[float, ...], Tuple[float, ...]]]:
+    """Строит отсортированные колонки (сечения, токи) без пропусков для бинарного поиска"""
+    table = {}
+    for key, currents in _RAW_RATINGS.items():
+        pairs = [(section, float(current)) for section, current in zip(SECTIONS, currents) if current is not None]
+        table[key] = (tuple(p[0] for p in pairs), tuple(p[1] for p in pairs))
+    return table
+
+
+RATING_TABLE = _build_table()
+INSTALLATION_METHODS = tuple(sorted({method for method, _ in RATING_TABLE}))
+_WIRE_COUNTS = {
+    method: tuple(sorted(count for m, count in RATING_TABLE if m == method))
+    for method in INSTALLATION_METHODS
+}
+
+
+def _column(installation_method: str, wire_count: int) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """Возвращает колонку таблицы для способа прокладки и количества жил"""
+    counts = _WIRE_COUNTS.get(installation_method)
+    if counts is None:
+        raise ValueError(f"Unknown installation method: {installation_method}")
+    # Больше жил, чем в таблице, - берем самую нагруженную колонку, меньше - самую легкую
+    count = min(max(wire_count, counts[0]), counts[-1])
+    if count not in counts:
+        count = counts[bisect_left(counts, count)]
+    return RATING_TABLE[(installation_method, count)]
+
+
+def allowed_current(section: float, installation_method: str = INSTALLATION_CABLE, wire_count: int = 3) -> float | None:
+    """Допустимый длительный ток для сечения (None, если сечения нет в таблице)"""
+    sections, currents = _column(installation_method, wire_count)
+    index = bisect_left(sections, section)
+    if index < len(sections) and sections[index] == section:
+        return currents[index]
+    return None
+
+
+@lru_cache(maxsize=4096)
+def suggest_section(power: float, distance: float,
+                    installation_method: str = INSTALLATION_CABLE, wire_count: int = 3) -> float:
+    """Минимальное сечение кабеля, проходящее по нагреву и по потере напряжения.
+
+    power - мощность нагрузки, Вт; distance - длина линии, м.
+    """
+    if not (math.isfinite(power) and math.isfinite(distance)) or power < 0 or distance < 0:
+        raise ValueError("Power and distance must be finite and non-negative")
+
+    sections, currents = _column(installation_method, wire_count)
+    current = power / NOMINAL_VOLTAGE
+
+    # По нагреву: первое сечение, допустимый ток которого не меньше расчетного
+    by_current = bisect_left(currents, current)
+    # По потере напряжения (фаза и ноль): S >= 2·L·I·ρ / ΔU
+    required_section = 2 * distance * current * COPPER_RESISTIVITY / (MAX_VOLTAGE_DROP * NOMINAL_VOLTAGE)
+    by_drop = bisect_left(sections, max(required_section, MIN_SECTION))
+
+    index = max(by_current, by_drop)
+    if index >= len(sections):
+        raise ValueError(f"Load of {power} W over {distance} m exceeds the rating table")
+    return sections[index]
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -61,6 +62,68 @@ def migrate_db():
                     print("Added active_layer column to projects table")
                 except Exception as e:
                     print(f"Error adding active_layer column: {e}")
+            
+            # Добавляем deleted_at, если его нет
+            if 'deleted_at' not in columns:
+                try:
+                    conn.execute(text('ALTER TABLE projects ADD COLUMN deleted_at DATETIME'))
+                    print("Added deleted_at column to projects table")
+                except Exception as e:
+                    print(f"Error adding deleted_at column: {e}")
+            
+            # Добавляем revision, если его нет
+            if 'revision' not in columns:
+                try:
+                    conn.execute(text('ALTER TABLE projects ADD COLUMN revision INTEGER NOT NULL DEFAULT 0'))
+                    print("Added revision column to projects table")
+                except Exception as e:
+                    print(f"Error adding revision column: {e}")
+            
+            # Добавляем journal_since_snapshot, если его нет
+            if 'journal_since_snapshot' not in columns:
+                try:
+                    conn.execute(text('ALTER TABLE projects ADD COLUMN journal_since_snapshot INTEGER NOT NULL DEFAULT 0'))
+                    print("Added journal_since_snapshot column to projects table")
+                except Exception as e:
+                    print(f"Error adding journal_since_snapshot column: {e}")
+    
+    # Таблицы из журнала операций пересоздаются с AUTOINCREMENT, чтобы SQLite не выдавал
+    # освободившиеся id другим строкам (отмена удаления вставляет строку с прежним id)
+    if engine.dialect.name == 'sqlite':
+        for table in ('elements', 'connections', 'panel_elements'):
+            if table in inspector.get_table_names():
+                try:
+                    _enable_autoincrement(table)
+                except Exception as e:
+                    print(f"Error enabling AUTOINCREMENT on {table}: {e}")
+
+    # Индексы по project_id для выборок и удаления по проекту
+    with engine.begin() as conn:
+        for table in ('elements', 'connections', 'panel_elements'):
+            if table in inspector.get_table_names():
+                try:
+                    conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table}_project_id ON {table} (project_id)'))
+                except Exception as e:
+                    print(f"Error creating project_id index on {table}: {e}")
+
+def _enable_autoincrement(name):
+    """Пересоздает таблицу SQLite по текущей модели с AUTOINCREMENT, сохраняя строки"""
+    with engine.begin() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                           {"name": name}).scalar()
+        if sql is None or 'AUTOINCREMENT' in sql.upper():
+            return
+        table = Base.metadata.tables[name]
+        create = str(CreateTable(table).compile(engine)).strip()
+        create = create.replace(f'CREATE TABLE {name} ', f'CREATE TABLE {name}_new ', 1)
+        columns = ', '.join(col['name'] for col in inspect(conn).get_columns(name) if col['name'] in table.c)
+        conn.execute(text(create))
+        conn.execute(text(f'INSERT INTO {name}_new ({columns}) SELECT {columns} FROM {name}'))
+        conn.execute(text(f'DROP TABLE {name}'))
+        conn.execute(text(f'ALTER TABLE {name}_new RENAME TO {name}'))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    print(f"Enabled AUTOINCREMENT on {name} table")
 
 def init_db():
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,124 @@
+"""
+Разбор SVG плана квартиры (Project.floor_plan_svg) в простые фигуры для экспорта
+"""
+import re
+import xml.etree.ElementTree as ET
+from io import StringIO
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+Point = Tuple[float, float]
+
+# Цвета условных обозначений элементов по Element.type
+ELEMENT_COLORS = {
+    'socket': '#1976D2',
+    'switch': '#388E3C',
+    'lamp': '#FBC02D',
+    'equipment': '#7B1FA2',
+    'panel': '#D32F2F',
+}
+DEFAULT_ELEMENT_COLOR = '#616161'
+CABLE_COLOR = '#E65100'
+
+_PATH_TOKEN = re.compile(r'[MLHVZmlhvz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+class PlanShape(NamedTuple):
+    """Фигура плана: прямоугольник (rect) или ломаная (path)"""
+    kind: str
+    points: List[Point]  # Для rect - левый верхний и правый нижний углы
+    closed: bool
+    fill: Optional[str]
+    stroke: Optional[str]
+    stroke_width: float
+
+
+def _color(value: Optional[str]) -> Optional[str]:
+    if not value or value == 'none':
+        return None
+    return value
+
+
+def parse_path(d: str) -> Tuple[List[Point], bool]:
+    """Разбирает команды M/L/H/V/Z атрибута d в список точек"""
+    points: List[Point] = []
+    closed = False
+    x = y = 0.0
+    command = 'M'
+    tokens = _PATH_TOKEN.findall(d)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.isalpha():
+            command = token
+            i += 1
+            if command in 'Zz':
+                closed = True
+            continue
+        relative = command.islower()
+        op = command.upper()
+        try:
+            if op in 'ML':
+                dx, dy = float(tokens[i]), float(tokens[i + 1])
+                i += 2
+                x, y = (x + dx, y + dy) if relative else (dx, dy)
+                # Повторные координаты после M трактуются как L
+                command = 'l' if relative else 'L'
+            elif op == 'H':
+                value = float(tokens[i])
+                i += 1
+                x = x + value if relative else value
+            elif op == 'V':
+                value = float(tokens[i])
+                i += 1
+                y = y + value if relative else value
+            else:
+                i += 1
+                continue
+        except (IndexError, ValueError):
+            break
+        points.append((x, y))
+    return points, closed
+
+
+def iter_plan_shapes(svg: Optional[str]) -> Iterator[PlanShape]:
+    """Потоково перебирает фигуры плана, не строя дерево документа целиком"""
+    if not svg:
+        return
+    try:
+        for _, node in ET.iterparse(StringIO(svg), events=('end',)):
+            tag = node.tag.rsplit('}', 1)[-1]
+            fill = _color(node.get('fill'))
+            stroke = _color(node.get('stroke'))
+            try:
+                stroke_width = float(node.get('stroke-width') or 1)
+            except ValueError:
+                stroke_width = 1.0
+            if tag == 'rect':
+                try:
+                    x = float(node.get('x') or 0)
+                    y = float(node.get('y') or 0)
+                    width = float(node.get('width') or 0)
+                    height = float(node.get('height') or 0)
+                except ValueError:
+                    node.clear()
+                    continue
+                yield PlanShape('rect', [(x, y), (x + width, y + height)], True, fill, stroke, stroke_width)
+            elif tag == 'path':
+                points, closed = parse_path(node.get('d') or '')
+                if len(points) > 1:
+                    yield PlanShape('path', points, closed, fill, stroke, stroke_width)
+            node.clear()
+    except ET.ParseError as e:
+        print(f"Error parsing floor plan SVG: {e}")
+
+
+def bounds(points: Iterable[Point]) -> Optional[Tuple[float, float, float, float]]:
+    """Габариты набора точек: (min_x, min_y, max_x, max_y)"""
+    min_x = min_y = float('inf')
+    max_x = max_y = float('-inf')
+    for x, y in points:
+        min_x, max_x = min(min_x, x), max(max_x, x)
+        min_y, max_y = min(min_y, y), max(max_y, y)
+    if min_x == float('inf'):
+        return None
+    return min_x, min_y, max_x, max_y
@@ -0,0 +1,84 @@
+"""
+Геометрические примитивы и поиск близко расположенных объектов:
+sort-and-sweep для прямоугольников и равномерная сетка для точек
+"""
+import heapq
+import math
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+
+class Rect(NamedTuple):
+    """Прямоугольник (для точечных объектов ширина и высота равны нулю)"""
+    id: int
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+def sweep_pairs(rects: Sequence[Rect], margin: float = 0.0) -> Iterator[Tuple[Rect, Rect]]:
+    """Перебирает пары прямоугольников, расширенные на margin габариты которых пересекаются.
+
+    Ось развертки выбирается по наибольшему разбросу (иначе, например, элементы вдоль
+    вертикальной стены все остались бы в активном множестве). Прямоугольники сортируются
+    по началу интервала на этой оси, активное множество хранит те, чей интервал (с учетом
+    margin) еще не закончился; устаревшие вытесняются через кучу по концу интервала.
+    Сложность O(n log n + k), где k - число пар, близких по оси развертки.
+    """
+    if not rects:
+        return
+    spread_x = max(r.x + r.width for r in rects) - min(r.x for r in rects)
+    spread_y = max(r.y + r.height for r in rects) - min(r.y for r in rects)
+    # (начало, длина) на оси развертки и на поперечной оси
+    if spread_x >= spread_y:
+        intervals = [(r.x, r.width, r.y, r.height, r) for r in rects]
+    else:
+        intervals = [(r.y, r.height, r.x, r.width, r) for r in rects]
+    intervals.sort(key=lambda item: item[0])
+
+    active = {}
+    expiry: List[Tuple[float, int]] = []
+    for index, (start, length, cross, cross_length, rect) in enumerate(intervals):
+        while expiry and expiry[0][0] <= start:
+            _, expired = heapq.heappop(expiry)
+            del active[expired]
+        for other_cross, other_cross_length, other in active.values():
+            if other_cross < cross + cross_length + margin and cross < other_cross + other_cross_length + margin:
+                yield other, rect
+        active[index] = (cross, cross_length, rect)
+        heapq.heappush(expiry, (start + length + margin, index))
+
+
+def grid_point_pairs(points: Sequence[Rect], distance: float) -> Iterator[Tuple[Rect, Rect]]:
+    """Перебирает пары точек, которые могут находиться ближе distance.
+
+    Точки раскладываются по равномерной сетке с ячейкой distance; каждая точка
+    сравнивается только с точками своей и соседних ячеек. Сложность O(n + k).
+    Кандидатов нужно дополнительно проверить по расстоянию.
+    """
+    if distance <= 0:
+        return
+    cells: Dict[Tuple[int, int], List[Rect]] = defaultdict(list)
+    for point in points:
+        cx, cy = math.floor(point.x / distance), math.floor(point.y / distance)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                cell = cells.get((cx + dx, cy + dy))
+                if cell:
+                    for other in cell:
+                        yield other, point
+        cells[(cx, cy)].append(point)
+
+
+def overlap(a: Rect, b: Rect) -> bool:
+    """Пересекаются ли прямоугольники по площади (касание не считается)"""
+    return (a.x < b.x + b.width and b.x < a.x + a.width and
+            a.y < b.y + b.height and b.y < a.y + a.height)
+
+
+def gap(a: Rect, b: Rect) -> float:
+    """Минимальное расстояние между прямоугольниками (0, если они касаются или пересекаются)"""
+    dx = max(0.0, b.x - (a.x + a.width), a.x - (b.x + b.width))
+    dy = max(0.0, b.y - (a.y + a.height), a.y - (b.y + b.height))
+    return math.hypot(dx, dy)
@@ -0,0 +1,264 @@
+"""
+Журнал операций проекта для отмены и повтора изменений.
+
+Каждая запись хранит только измененные строки и поля (before/after), поэтому отмена
+и повтор выполняются за время, пропорциональное размеру изменения. Периодические
+снимки состояния ограничивают объем воспроизведения при переходе к произвольной записи.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .revisions import bump_revision
+
+# Каждые SNAPSHOT_INTERVAL записей сохраняется полный снимок проекта
+SNAPSHOT_INTERVAL = int(os.getenv("JOURNAL_SNAPSHOT_INTERVAL", "50"))
+# История ограничивается по количеству записей на проект и по возрасту
+MAX_ENTRIES = int(os.getenv("JOURNAL_MAX_ENTRIES", "500"))
+MAX_AGE_DAYS = int(os.getenv("JOURNAL_MAX_AGE_DAYS", "30"))
+
+TABLES = {
+    "projects": models.Project,
+    "elements": models.Element,
+    "connections": models.Connection,
+    "panel_elements": models.PanelElement,
+}
+SNAPSHOT_MODELS = (models.Element, models.Connection, models.PanelElement)
+PROJECT_FIELDS = [
+    "name", "scale", "floor_plan_image", "floor_plan_svg", "floor_plan_locked", "elements_locked", "active_layer",
+]
+
+Change = Dict[str, Any]
+
+
+def max_issued_id(db: Session, model) -> int:
+    """Наибольший id, когда-либо выданный в таблице.
+
+    Код, назначающий id явно (импорт, копирование проекта), должен начинать после него:
+    id удаленных строк остаются в журнале и не должны достаться новым строкам.
+    """
+    table = model.__table__
+    max_id = db.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+    if db.get_bind().dialect.name == "sqlite":
+        sequence = db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": table.name}).scalar()
+        max_id = max(max_id, sequence or 0)
+    return max_id
+
+
+def row_to_dict(obj) -> Dict[str, Any]:
+    """Значения колонок ORM-объекта"""
+    return {column.name: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def inserted(obj) -> Change:
+    """Изменение для созданной строки (объект должен иметь id, т.е. после flush)"""
+    return {"table": obj.__tablename__, "action": "insert", "id": obj.id, "before": None, "after": row_to_dict(obj)}
+
+
+def deleted(obj) -> Change:
+    """Изменение для удаляемой строки"""
+    return {"table": obj.__tablename__, "action": "delete", "id": obj.id, "before": row_to_dict(obj), "after": None}
+
+
+def updated(obj, values: Dict[str, Any], table: Optional[str] = None) -> Optional[Change]:
+    """Изменение для обновляемой строки; вызывается до присваивания новых значений.
+
+    obj может быть и строкой результата запроса по колонкам, тогда имя таблицы передается в table.
+    """
+    before = {}
+    after = {}
+    for field, value in values.items():
+        old_value = getattr(obj, field)
+        if old_value != value:
+            before[field] = old_value
+            after[field] = value
+    if not before:
+        return None
+    return {"table": table or obj.__tablename__, "action": "update", "id": obj.id, "before": before, "after": after}
+
+
+def _apply(db: Session, change: Change, forward: bool):
+    """Применяет изменение (forward) или обратное к нему"""
+    table = TABLES[change["table"]].__table__
+    action = change["action"]
+    if action == "update":
+        values = change["after"] if forward else change["before"]
+        db.execute(update(table).where(table.c.id == change["id"]).values(**values))
+    elif (action == "insert") == forward:
+        values = change["after"] if forward else change["before"]
+        db.execute(insert(table).values(**values))
+    else:
+        db.execute(delete(table).where(table.c.id == change["id"]))
+
+
+def _apply_entry(db: Session, entry: models.JournalEntry, forward: bool):
+    changes = entry.changes if forward else reversed(entry.changes)
+    for change in changes:
+        _apply(db, change, forward)
+    entry.undone = not forward
+    bump_revision(db, entry.project_id)
+
+
+def _snapshot(db: Session, project_id: int, entry_id: int):
+    """Сохраняет полное состояние проекта после записи entry_id"""
+    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    data: Dict[str, Any] = {"projects": {field: getattr(project, field) for field in PROJECT_FIELDS}}
+    for model in SNAPSHOT_MODELS:
+        table = model.__table__
+        data[table.name] = [
+            dict(row._mapping)
+            for row in db.execute(select(table).where(table.c.project_id == project_id).order_by(table.c.id))
+        ]
+    db.add(models.JournalSnapshot(project_id=project_id, entry_id=entry_id, data=data))
+
+
+def _restore_snapshot(db: Session, project_id: int, snapshot: models.JournalSnapshot):
+    db.execute(update(models.Project.__table__).where(models.Project.id == project_id)
+               .values(**snapshot.data["projects"]))
+    for model in reversed(SNAPSHOT_MODELS):
+        db.execute(delete(model.__table__).where(model.__table__.c.project_id == project_id))
+    for model in SNAPSHOT_MODELS:
+        rows = snapshot.data[model.__tablename__]
+        if rows:
+            db.execute(insert(model.__table__), rows)
+
+
+def _prune(db: Session, project_id: int):
+    """Удаляет историю старше MAX_AGE_DAYS и сверх MAX_ENTRIES записей"""
+    entries = models.JournalEntry.__table__
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=MAX_AGE_DAYS)
+    db.execute(delete(entries).where(entries.c.project_id == project_id, entries.c.created_at < cutoff))
+    boundary = db.execute(
+        select(entries.c.id).where(entries.c.project_id == project_id)
+        .order_by(entries.c.id.desc()).offset(MAX_ENTRIES).limit(1)
+    ).scalar()
+    if boundary is not None:
+        db.execute(delete(entries).where(entries.c.project_id == project_id, entries.c.id <= boundary))
+
+    # Снимки до самой старой записи уже не от чего воспроизводить
+    oldest = db.execute(select(func.min(entries.c.id)).where(entries.c.project_id == project_id)).scalar()
+    snapshots = models.JournalSnapshot.__table__
+    condition = snapshots.c.project_id == project_id
+    if oldest is not None:
+        condition = condition & (snapshots.c.entry_id < oldest)
+    db.execute(delete(snapshots).where(condition))
+
+
+def record(db: Session, project_id: int, operation: str, changes: Iterable[Optional[Change]]) -> Optional[models.JournalEntry]:
+    """Записывает операцию в журнал в текущей транзакции.
+
+    Вызывается после изменения данных и до commit. Новая операция очищает историю повтора.
+    Снимок состояния и очистка старой истории выполняются раз в SNAPSHOT_INTERVAL записей,
+    поэтому обычная запись - это вставка строки журнала и одно обновление счетчиков проекта.
+    """
+    changes = [change for change in changes if change]
+    if not changes:
+        return None
+    db.flush()
+
+    first_undone = db.execute(
+        select(func.min(models.JournalEntry.id))
+        .where(models.JournalEntry.project_id == project_id, models.JournalEntry.undone.is_(True))
+    ).scalar()
+    if first_undone is not None:
+        db.execute(delete(models.JournalEntry.__table__).where(
+            models.JournalEntry.project_id == project_id, models.JournalEntry.undone.is_(True)))
+        db.execute(delete(models.JournalSnapshot.__table__).where(
+            models.JournalSnapshot.project_id == project_id, models.JournalSnapshot.entry_id >= first_undone))
+
+    entry = models.JournalEntry(project_id=project_id, operation=operation, changes=changes, undone=False)
+    db.add(entry)
+    db.flush()
+
+    # Ревизия проекта и счетчик записей после последнего снимка увеличиваются одним запросом
+    projects = models.Project.__table__
+    since_snapshot = db.execute(
+        update(projects).where(projects.c.id == project_id)
+        .values(revision=func.coalesce(projects.c.revision, 0) + 1,
+                journal_since_snapshot=func.coalesce(projects.c.journal_since_snapshot, 0) + 1)
+        .returning(projects.c.journal_since_snapshot)
+    ).scalar()
+    if since_snapshot is not None and since_snapshot >= SNAPSHOT_INTERVAL:
+        _snapshot(db, project_id, entry.id)
+        db.execute(update(projects).where(projects.c.id == project_id).values(journal_since_snapshot=0))
+        _prune(db, project_id)
+    return entry
+
+
+def undo(db: Session, project_id: int) -> Optional[models.JournalEntry]:
+    """Отменяет последнюю операцию проекта"""
+    entry = db.query(models.JournalEntry).filter(
+        models.JournalEntry.project_id == project_id, models.JournalEntry.undone.is_(False)
+    ).order_by(models.JournalEntry.id.desc()).first()
+    if entry:
+        _apply_entry(db, entry, forward=False)
+    return entry
+
+
+def redo(db: Session, project_id: int) -> Optional[models.JournalEntry]:
+    """Повторяет последнюю отмененную операцию проекта"""
+    entry = db.query(models.JournalEntry).filter(
+        models.JournalEntry.project_id == project_id, models.JournalEntry.undone.is_(True)
+    ).order_by(models.JournalEntry.id.asc()).first()
+    if entry:
+        _apply_entry(db, entry, forward=True)
+    return entry
+
+
+def revert(db: Session, project_id: int, entry_id: int) -> bool:
+    """Приводит проект к состоянию сразу после записи entry_id.
+
+    Последующие записи становятся доступными для повтора. Если между текущим
+    состоянием и целевым больше SNAPSHOT_INTERVAL записей, состояние восстанавливается
+    из ближайшего предшествующего снимка с воспроизведением не более SNAPSHOT_INTERVAL записей.
+    """
+    query = db.query(models.JournalEntry).filter(models.JournalEntry.project_id == project_id)
+    if not query.filter(models.JournalEntry.id == entry_id).first():
+        return False
+
+    current = db.execute(
+        select(func.max(models.JournalEntry.id))
+        .where(models.JournalEntry.project_id == project_id, models.JournalEntry.undone.is_(False))
+    ).scalar() or 0
+    low, high = sorted((current, entry_id))
+    distance = query.filter(models.JournalEntry.id > low, models.JournalEntry.id <= high).count()
+
+    snapshot = None
+    if distance > SNAPSHOT_INTERVAL:
+        snapshot = db.query(models.JournalSnapshot).filter(
+            models.JournalSnapshot.project_id == project_id, models.JournalSnapshot.entry_id <= entry_id
+        ).order_by(models.JournalSnapshot.entry_id.desc()).first()
+
+    if snapshot:
+        _restore_snapshot(db, project_id, snapshot)
+        for entry in query.filter(models.JournalEntry.id > snapshot.entry_id,
+                                  models.JournalEntry.id <= entry_id).order_by(models.JournalEntry.id):
+            for change in entry.changes:
+                _apply(db, change, forward=True)
+        db.query(models.JournalEntry).filter(
+            models.JournalEntry.project_id == project_id, models.JournalEntry.id <= entry_id
+        ).update({"undone": False}, synchronize_session=False)
+        db.query(models.JournalEntry).filter(
+            models.JournalEntry.project_id == project_id, models.JournalEntry.id > entry_id
+        ).update({"undone": True}, synchronize_session=False)
+        bump_revision(db, project_id)
+    elif entry_id < current:
+        for entry in query.filter(models.JournalEntry.id > entry_id, models.JournalEntry.undone.is_(False)) \
+                .order_by(models.JournalEntry.id.desc()):
+            _apply_entry(db, entry, forward=False)
+    else:
+        for entry in query.filter(models.JournalEntry.id <= entry_id, models.JournalEntry.undone.is_(True)) \
+                .order_by(models.JournalEntry.id):
+            _apply_entry(db, entry, forward=True)
+    return True
+
+
+def history(db: Session, project_id: int, limit: int = 100) -> List[models.JournalEntry]:
+    """Последние записи журнала проекта"""
+    return db.query(models.JournalEntry).filter(
+        models.JournalEntry.project_id == project_id
+    ).order_by(models.JournalEntry.id.desc()).limit(limit).all()
@@ -1,7 +1,10 @@
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
-from .api import projects, elements, connections, panel, export, modules
+from .database import engine, init_db
+from .project_deletion import purge_deleted_projects
+from .metrics import MetricsMiddleware, instrument_engine
+from .api import projects, elements, connections, panel, export, modules, cables, validation, metrics, archive, imports, journal, bom
 from .modules.module_manager import ModuleManager
 
 app = FastAPI(title="Wiring Designer API", version="1.0.0")
@@ -15,10 +18,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Замер времени запросов и SQL-запросов
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+
 # Инициализация БД
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    # Дочистка проектов, фоновое удаление которых было прервано
+    threading.Thread(target=purge_deleted_projects, daemon=True).start()
     # Загрузка модулей при старте
     modules.module_manager.load_modules()
 
@@ -29,6 +38,13 @@ app.include_router(connections.router)
 app.include_router(panel.router)
 app.include_router(export.router)
 app.include_router(modules.router)
+app.include_router(cables.router)
+app.include_router(validation.router)
+app.include_router(archive.router)
+app.include_router(imports.router)
+app.include_router(journal.router)
+app.include_router(bom.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def root():
@@ -0,0 +1,200 @@
+"""
+Инструментирование: время обработки запросов, количество и длительность SQL-запросов,
+вывод метрик в формате Prometheus
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Порог медленного SQL-запроса, мс
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (кумулятивная при выводе)"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class RequestStats:
+    """SQL-статистика текущего запроса"""
+
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Хранилище метрик процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency: Dict[Tuple[str, str, int], Histogram] = {}
+        self.request_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.request_query_time: Dict[Tuple[str, str], Histogram] = {}
+        self.query_count = 0
+        self.query_time = 0.0
+        self.slow_query_count = 0
+
+    def record_request(self, method: str, route: str, status: int, duration: float, stats: RequestStats):
+        with self._lock:
+            key = (method, route, status)
+            if key not in self.request_latency:
+                self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+            self.request_latency[key].observe(duration)
+            if (method, route) not in self.request_queries:
+                self.request_queries[(method, route)] = Histogram(QUERY_COUNT_BUCKETS)
+                self.request_query_time[(method, route)] = Histogram(LATENCY_BUCKETS)
+            self.request_queries[(method, route)].observe(stats.queries)
+            self.request_query_time[(method, route)].observe(stats.query_time)
+
+    def record_query(self, statement: str, duration: float):
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += duration
+        slow = duration * 1000 >= SLOW_QUERY_MS
+        with self._lock:
+            self.query_count += 1
+            self.query_time += duration
+            if slow:
+                self.slow_query_count += 1
+        if slow:
+            logger.warning("Slow query (%.1f ms): %s", duration * 1000, " ".join(statement.split()))
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route, status), histogram in sorted(self.request_latency.items()):
+                labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+                lines.extend(histogram.render("http_request_duration_seconds", labels))
+            lines.append("# HELP http_request_db_queries SQL queries executed per request")
+            lines.append("# TYPE http_request_db_queries histogram")
+            for (method, route), histogram in sorted(self.request_queries.items()):
+                labels = f'method="{method}",route="{_escape(route)}"'
+                lines.extend(histogram.render("http_request_db_queries", labels))
+            lines.append("# HELP http_request_db_query_duration_seconds Time spent in SQL queries per request")
+            lines.append("# TYPE http_request_db_query_duration_seconds histogram")
+            for (method, route), histogram in sorted(self.request_query_time.items()):
+                labels = f'method="{method}",route="{_escape(route)}"'
+                lines.extend(histogram.render("http_request_db_query_duration_seconds", labels))
+            lines.extend([
+                "# HELP db_queries_total SQL queries executed",
+                "# TYPE db_queries_total counter",
+                f"db_queries_total {self.query_count}",
+                "# HELP db_query_duration_seconds_total Total time spent in SQL queries",
+                "# TYPE db_query_duration_seconds_total counter",
+                f"db_query_duration_seconds_total {self.query_time}",
+                "# HELP db_slow_queries_total SQL queries slower than SLOW_QUERY_MS",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self.slow_query_count}",
+            ])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def instrument_engine(engine: Engine):
+    """Подключает подсчет и замер времени SQL-запросов к движку SQLAlchemy"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        registry.record_query(statement, time.perf_counter() - start)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute не вызывается для упавшего запроса: снимаем его отметку времени здесь,
+        # иначе она останется на соединении из пула
+        conn = exception_context.connection
+        if conn is None or exception_context.execution_context is None:
+            return
+        starts = conn.info.get("query_start")
+        if starts:
+            registry.record_query(exception_context.statement or "", time.perf_counter() - starts.pop())
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: время обработки запроса, число и время SQL-запросов по маршрутам"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.queries).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            _current_request.reset(token)
+            # Шаблон пути маршрута (например /api/projects/{project_id}) вместо фактического пути
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            registry.record_request(scope["method"], route_path, status_code, duration, stats)
@@ -1,8 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, JSON, DateTime, Boolean
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 
+class Flag(TypeDecorator):
+    """Логический флаг в INTEGER-колонке (0/1); NULL в старых записях читается как False"""
+    impl = Integer
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else int(bool(value))
+    
+    def process_result_value(self, value, dialect):
+        return bool(value)
+
 class Project(Base):
     __tablename__ = "projects"
     
@@ -12,9 +24,12 @@ class Project(Base):
     scale = Column(Float, default=1.0)
     floor_plan_image = Column(Text, nullable=True)  # Base64 или путь к изображению
     floor_plan_svg = Column(Text, nullable=True)  # SVG данные плана квартиры
-    floor_plan_locked = Column(Integer, default=0)  # Флаг блокировки слоя плана (0 - разблокирован, 1 - заблокирован)
-    elements_locked = Column(Integer, default=0)  # Флаг блокировки слоя электроэлементов (0 - разблокирован, 1 - заблокирован)
+    floor_plan_locked = Column(Flag, default=False)  # Флаг блокировки слоя плана (в БД 0 - разблокирован, 1 - заблокирован)
+    elements_locked = Column(Flag, default=False)  # Флаг блокировки слоя электроэлементов (в БД 0 - разблокирован, 1 - заблокирован)
     active_layer = Column(String, default='elements')  # Активный слой: 'plan' или 'elements'
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # Помечен на удаление (фоновая очистка)
+    revision = Column(Integer, default=0, nullable=False)  # Номер ревизии, растет при каждом изменении проекта
+    journal_since_snapshot = Column(Integer, default=0, nullable=False)  # Записей журнала после последнего снимка
     
     elements = relationship("Element", back_populates="project", cascade="all, delete-orphan")
     connections = relationship("Connection", back_populates="project", cascade="all, delete-orphan")
@@ -22,9 +37,10 @@ class Project(Base):
 
 class Element(Base):
     __tablename__ = "elements"
+    __table_args__ = {"sqlite_autoincrement": True}  # id не переиспользуются: на них ссылается журнал операций
     
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     element_id = Column(String, nullable=False)  # Пользовательский ID
     type = Column(String, nullable=False)  # socket, switch, lamp, equipment, panel
     name = Column(String, nullable=False)
@@ -39,9 +55,10 @@ class Element(Base):
 
 class PanelElement(Base):
     __tablename__ = "panel_elements"
+    __table_args__ = {"sqlite_autoincrement": True}  # id не переиспользуются: на них ссылается журнал операций
     
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     element_id = Column(Integer, ForeignKey("elements.id"), nullable=False)
     position_x = Column(Float, nullable=False)
     position_y = Column(Float, nullable=False)
@@ -53,9 +70,10 @@ class PanelElement(Base):
 
 class Connection(Base):
     __tablename__ = "connections"
+    __table_args__ = {"sqlite_autoincrement": True}  # id не переиспользуются: на них ссылается журнал операций
     
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     from_element_id = Column(Integer, ForeignKey("elements.id"), nullable=False)
     to_element_id = Column(Integer, ForeignKey("elements.id"), nullable=False)
     cable_section = Column(Float, nullable=False)  # Сечение кабеля в мм²
@@ -66,3 +84,29 @@ class Connection(Base):
     from_element = relationship("Element", foreign_keys=[from_element_id], back_populates="connections_from")
     to_element = relationship("Element", foreign_keys=[to_element_id], back_populates="connections_to")
 
+
+class JournalEntry(Base):
+    __tablename__ = "journal_entries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    operation = Column(String, nullable=False)  # Название операции, например update_element
+    changes = Column(JSON, nullable=False)  # Список изменений строк: table, action, id, before, after
+    undone = Column(Boolean, default=False, nullable=False)  # Отменена (доступна для повтора)
+
+class JournalSnapshot(Base):
+    __tablename__ = "journal_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    entry_id = Column(Integer, nullable=False)  # Состояние проекта после этой записи журнала
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    data = Column(JSON, nullable=False)  # Строки элементов, связей и элементов щита
+
+class BomCache(Base):
+    __tablename__ = "bom_cache"
+    
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    revision = Column(Integer, nullable=False)  # Ревизия проекта, для которой рассчитана спецификация
+    data = Column(JSON, nullable=False)
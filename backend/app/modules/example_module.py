@@ -4,6 +4,7 @@
 """
 from typing import Dict, Any, List
 from .base_module import BaseModule, ConnectionModule
+from ..cable_ratings import INSTALLATION_CABLE, suggest_section
 
 class ExampleConnectionModule(ConnectionModule):
     """Пример модуля для работы со связями"""
@@ -38,29 +39,8 @@ class ExampleConnectionModule(ConnectionModule):
         scale = 0.01
         return distance * scale
     
-    def suggest_cable_section(self, power: float, distance: float) -> float:
+    def suggest_cable_section(self, power: float, distance: float,
+                              installation_method: str = INSTALLATION_CABLE, wire_count: int = 3) -> float:
         """Предложение сечения кабеля на основе мощности и расстояния"""
-        # Упрощенная логика выбора сечения
-        # Для 220В, учитывая потери и запас
-        if power <= 1000:  # до 1 кВт
-            if distance <= 10:
-                return 1.5
-            elif distance <= 20:
-                return 2.5
-            else:
-                return 4.0
-        elif power <= 2000:  # до 2 кВт
-            if distance <= 10:
-                return 2.5
-            elif distance <= 20:
-                return 4.0
-            else:
-                return 6.0
-        else:  # более 2 кВт
-            if distance <= 10:
-                return 4.0
-            elif distance <= 20:
-                return 6.0
-            else:
-                return 10.0
-
+        # Подбор по таблицам допустимых токов ПУЭ и потере напряжения (с кешированием)
+        return suggest_section(power, distance, installation_method, wire_count)
@@ -2,22 +2,50 @@
 Менеджер модулей для загрузки и управления плагинами
 """
 import os
+import sys
 import importlib
+import importlib.util
 import inspect
-from typing import Dict, List, Type, Any
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Type, Any, Iterator
 from .base_module import BaseModule
+from ..shared_state import SharedState
+
+# Канал общего состояния с изменениями модулей и префикс ключей флагов включения
+MODULES_CHANNEL = "modules"
+ENABLED_KEY = "modules.enabled."
 
 class ModuleManager:
     """Менеджер для загрузки и управления модулями"""
     
-    def __init__(self, modules_directory: str = None):
+    def __init__(self, modules_directory: str = None, drain_timeout: float = 30.0, state: SharedState = None):
         if modules_directory is None:
             # Получаем путь к директории modules
             current_dir = os.path.dirname(os.path.abspath(__file__))
             modules_directory = current_dir
         
         self.modules_directory = modules_directory
+        self.drain_timeout = drain_timeout
         self.loaded_modules: Dict[str, BaseModule] = {}
+        
+        # Блокировка для атомарной подмены экземпляров в loaded_modules
+        self._lock = threading.RLock()
+        # Счетчики запросов, использующих экземпляр модуля (по id экземпляра)
+        self._in_flight: Dict[int, int] = {}
+        self._drained = threading.Condition(self._lock)
+        # Блокировки перезагрузки по именам модулей: перезагрузки одного модуля
+        # (из API и из фоновой синхронизации) выполняются по очереди
+        self._reload_locks: Dict[str, threading.Lock] = {}
+        
+        # Общее состояние процессов: флаги включения и сообщения о перезагрузке модулей.
+        # Без него (state=None) состояние модулей хранится только в памяти процесса
+        self.state = state
+        self._origin = uuid.uuid4().hex
+        self._revision = 0
+        self._sync_lock = threading.Lock()
     
     def load_modules(self) -> List[str]:
         """Загружает все модули из директории"""
@@ -37,59 +65,205 @@ class ModuleManager:
                 except Exception as e:
                     print(f"Error loading module {module_name}: {e}")
         
+        if self.state is not None:
+            # Сообщения до запуска процесса не применяются: модули только что загружены из файлов
+            with self._sync_lock:
+                self._revision = self.state.counter(MODULES_CHANNEL)
+                self._apply_flags()
         return loaded
     
+    def _create_instance(self, module_name: str, reload: bool = False) -> BaseModule | None:
+        """Импортирует (или перечитывает) файл модуля и создает экземпляр плагина.
+        
+        Экземпляр создается и инициализируется в стороне, не затрагивая loaded_modules.
+        При перезагрузке файл исполняется в новом объекте модуля, а не через importlib.reload:
+        глобальные переменные модуля, которыми пользуется старый экземпляр, не меняются.
+        """
+        module_path = f"app.modules.{module_name}"
+        if reload:
+            file_path = os.path.join(self.modules_directory, f"{module_name}.py")
+            spec = importlib.util.spec_from_file_location(module_path, file_path)
+            if spec is None:
+                raise ImportError(f"Cannot load module file {file_path}")
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            # Последующие импорты по имени получают новую версию; старый объект модуля остается у старого экземпляра
+            sys.modules[module_path] = module
+        else:
+            module = importlib.import_module(module_path)
+        
+        # Ищем конкретные классы, объявленные в самом модуле и наследующиеся от BaseModule
+        for name, obj in inspect.getmembers(module, inspect.isclass):
+            if (issubclass(obj, BaseModule) and
+                    obj.__module__ == module.__name__ and
+                    not inspect.isabstract(obj)):
+                instance = obj()
+                
+                # Инициализируем модуль
+                context = {"module_manager": self}
+                if instance.initialize(context) is False:
+                    print(f"Module {module_name} failed to initialize")
+                    return None
+                
+                return instance
+        return None
+    
     def load_module(self, module_name: str) -> BaseModule | None:
         """Загружает конкретный модуль"""
         try:
-            # Импортируем модуль
-            module_path = f"app.modules.{module_name}"
-            module = importlib.import_module(module_path)
-            
-            # Ищем классы, наследующиеся от BaseModule
-            for name, obj in inspect.getmembers(module):
-                if (inspect.isclass(obj) and 
-                    issubclass(obj, BaseModule) and 
-                    obj != BaseModule):
-                    # Создаем экземпляр модуля
-                    instance = obj()
-                    self.loaded_modules[module_name] = instance
-                    
-                    # Инициализируем модуль
-                    context = {"module_manager": self}
-                    instance.initialize(context)
-                    
-                    return instance
+            instance = self._create_instance(module_name)
         except Exception as e:
             print(f"Error loading module {module_name}: {e}")
             return None
+        
+        if instance is not None:
+            with self._lock:
+                self.loaded_modules[module_name] = instance
+        return instance
+    
+    def _apply_flags(self):
+        flags = self.state.get_prefix(ENABLED_KEY)
+        with self._lock:
+            for name, module in self.loaded_modules.items():
+                if ENABLED_KEY + name in flags:
+                    module.enabled = bool(flags[ENABLED_KEY + name])
+    
+    def sync(self):
+        """Применяет изменения модулей, сделанные другими процессами.
+        
+        Обычно это одно чтение счетчика канала; флаги и сообщения дочитываются, только если он изменился.
+        """
+        if self.state is None:
+            return
+        with self._sync_lock:
+            revision = self.state.counter(MODULES_CHANNEL)
+            if revision == self._revision:
+                return
+            messages = self.state.poll(MODULES_CHANNEL, self._revision)
+            self._revision = max([revision] + [message_revision for message_revision, _ in messages])
+            self._apply_flags()
+        
+        for _, message in messages:
+            if message.get("action") == "reload" and message.get("origin") != self._origin:
+                # Файл модуля перечитывается в фоне, не задерживая текущий запрос
+                threading.Thread(target=self.reload_module, args=(message["module"],),
+                                 kwargs={"publish": False}, daemon=True).start()
+    
+    def set_enabled(self, module_name: str, enabled: bool) -> bool:
+        """Включает или отключает модуль во всех процессах"""
+        module = self.get_module(module_name)
+        if module is None:
+            return False
+        module.enabled = enabled
+        if self.state is not None:
+            self.state.set(ENABLED_KEY + module_name, enabled)
+            self.state.publish(MODULES_CHANNEL, {"action": "enabled", "module": module_name, "origin": self._origin})
+        return True
     
     def get_module(self, module_name: str) -> BaseModule | None:
         """Получает загруженный модуль по имени"""
-        return self.loaded_modules.get(module_name)
+        self.sync()
+        with self._lock:
+            return self.loaded_modules.get(module_name)
+    
+    @contextmanager
+    def use_module(self, module_name: str) -> Iterator[BaseModule | None]:
+        """Захватывает модуль на время запроса.
+        
+        Пока экземпляр захвачен, горячая перезагрузка не вызовет у него cleanup().
+        """
+        self.sync()
+        with self._lock:
+            module = self.loaded_modules.get(module_name)
+            if module is not None:
+                self._in_flight[id(module)] = self._in_flight.get(id(module), 0) + 1
+        try:
+            yield module
+        finally:
+            if module is not None:
+                with self._lock:
+                    count = self._in_flight[id(module)] - 1
+                    if count:
+                        self._in_flight[id(module)] = count
+                    else:
+                        del self._in_flight[id(module)]
+                        self._drained.notify_all()
     
     def get_all_modules(self) -> Dict[str, BaseModule]:
         """Возвращает все загруженные модули"""
-        return self.loaded_modules.copy()
+        self.sync()
+        with self._lock:
+            return self.loaded_modules.copy()
     
     def get_modules_by_type(self, module_type: Type[BaseModule]) -> List[BaseModule]:
         """Возвращает модули определенного типа"""
-        return [
-            module for module in self.loaded_modules.values()
-            if isinstance(module, module_type)
-        ]
+        self.sync()
+        with self._lock:
+            return [
+                module for module in self.loaded_modules.values()
+                if isinstance(module, module_type)
+            ]
+    
+    def _reload_lock(self, module_name: str) -> threading.Lock:
+        with self._lock:
+            return self._reload_locks.setdefault(module_name, threading.Lock())
+    
+    def _drain(self, module: BaseModule) -> bool:
+        """Ждет завершения запросов, использующих старый экземпляр модуля"""
+        deadline = time.monotonic() + self.drain_timeout
+        with self._lock:
+            while self._in_flight.get(id(module)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._drained.wait(remaining)
+        return True
+    
+    def _retire(self, module_name: str, module: BaseModule):
+        """Освобождает ресурсы экземпляра после завершения всех его запросов"""
+        if not self._drain(module):
+            print(f"Module {module_name}: in-flight requests did not finish in {self.drain_timeout}s, cleaning up anyway")
+        module.cleanup()
+    
+    def _retire_later(self, module_name: str, module: BaseModule):
+        """Освобождает старый экземпляр в фоне, не задерживая запрос на перезагрузку"""
+        threading.Thread(target=self._retire, args=(module_name, module), daemon=True).start()
     
     def unload_module(self, module_name: str) -> bool:
         """Выгружает модуль"""
-        if module_name in self.loaded_modules:
-            module = self.loaded_modules[module_name]
-            module.cleanup()
-            del self.loaded_modules[module_name]
-            return True
-        return False
-    
-    def reload_module(self, module_name: str) -> bool:
-        """Перезагружает модуль"""
-        self.unload_module(module_name)
-        return self.load_module(module_name) is not None
-
+        with self._lock:
+            module = self.loaded_modules.pop(module_name, None)
+        if module is None:
+            return False
+        self._retire_later(module_name, module)
+        return True
+    
+    def reload_module(self, module_name: str, publish: bool = True) -> bool:
+        """Перезагружает модуль без простоя.
+        
+        Новый экземпляр собирается из перечитанного файла, затем атомарно
+        подменяет старый; старый экземпляр очищается после завершения запросов.
+        С publish=True перезагрузка передается остальным процессам через общее состояние.
+        """
+        with self._reload_lock(module_name):
+            try:
+                instance = self._create_instance(module_name, reload=True)
+            except Exception as e:
+                # Старый экземпляр продолжает обслуживать запросы
+                print(f"Error reloading module {module_name}: {e}")
+                return False
+            if instance is None:
+                return False
+            
+            with self._lock:
+                old_instance = self.loaded_modules.get(module_name)
+                if old_instance is not None:
+                    # Сохраняем состояние включения при перезагрузке
+                    instance.enabled = old_instance.enabled
+                self.loaded_modules[module_name] = instance
+        
+        if publish and self.state is not None:
+            self.state.publish(MODULES_CHANNEL, {"action": "reload", "module": module_name, "origin": self._origin})
+        if old_instance is not None:
+            self._retire_later(module_name, old_instance)
+        return True
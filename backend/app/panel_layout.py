@@ -0,0 +1,91 @@
+"""
+Автоматическая компоновка элементов щита по рядам DIN-рейки
+и поиск перекрытий между элементами
+"""
+from typing import Dict, List, Sequence, Tuple
+from .geometry import Rect, overlap, sweep_pairs
+
+
+class _FirstFitTree:
+    """Дерево отрезков по максимальному свободному месту в рядах.
+
+    Позволяет найти первый ряд, в который помещается модуль, за O(log n).
+    """
+
+    def __init__(self, capacity: int):
+        size = 1
+        while size < max(capacity, 1):
+            size *= 2
+        self.size = size
+        self.tree = [float('-inf')] * (2 * size)
+
+    def set(self, index: int, value: float):
+        i = index + self.size
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def first_fit(self, width: float) -> int:
+        """Индекс первого ряда со свободным местом не меньше width, либо -1"""
+        if self.tree[1] < width:
+            return -1
+        i = 1
+        while i < self.size:
+            i = 2 * i if self.tree[2 * i] >= width else 2 * i + 1
+        return i - self.size
+
+
+def pack_rows(items: Sequence[Rect], row_width: float, gap: float = 0.0,
+              row_gap: float = 0.0) -> Tuple[List[Rect], int]:
+    """Раскладывает модули по рядам методом First-Fit Decreasing.
+
+    Модули сортируются по убыванию ширины и ставятся в первый ряд, где есть место.
+    Высота ряда равна высоте самого высокого модуля в нем. Модуль шире ряда
+    занимает отдельный ряд. Возвращает новые прямоугольники и количество рядов.
+    """
+    ordered = sorted(items, key=lambda r: (-r.width, r.id))
+    tree = _FirstFitTree(len(ordered))
+    free: List[float] = []  # Свободное место в каждом ряду
+    rows: List[List[Tuple[Rect, float]]] = []  # Модули ряда и их смещение по X
+
+    for item in ordered:
+        needed = item.width + gap
+        row = tree.first_fit(needed)
+        if row == -1:
+            row = len(rows)
+            rows.append([])
+            free.append(row_width + gap)
+        offset = row_width + gap - free[row]
+        rows[row].append((item, offset))
+        free[row] -= needed
+        tree.set(row, free[row])
+
+    placed: List[Rect] = []
+    y = 0.0
+    for row in rows:
+        row_height = max(item.height for item, _ in row)
+        for item, offset in row:
+            placed.append(Rect(item.id, offset, y, item.width, item.height))
+        y += row_height + row_gap
+    return placed, len(rows)
+
+
+def find_overlaps(rects: Sequence[Rect]) -> List[Tuple[int, int]]:
+    """Находит пары перекрывающихся прямоугольников"""
+    return [
+        (min(a.id, b.id), max(a.id, b.id))
+        for a, b in sweep_pairs(rects)
+        if overlap(a, b)
+    ]
+
+
+def layout_bounds(rects: Sequence[Rect]) -> Dict[str, float]:
+    """Габариты компоновки"""
+    if not rects:
+        return {"width": 0.0, "height": 0.0}
+    return {
+        "width": max(r.x + r.width for r in rects),
+        "height": max(r.y + r.height for r in rects),
+    }
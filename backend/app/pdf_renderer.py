@@ -0,0 +1,248 @@
+"""
+Формирование PDF-отчета по проекту: таблицы элементов и связей, план с элементами и кабелями
+"""
+import os
+from functools import lru_cache
+from io import BytesIO
+from itertools import chain, islice
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .floor_plan import CABLE_COLOR, DEFAULT_ELEMENT_COLOR, ELEMENT_COLORS, bounds, iter_plan_shapes
+
+# Шрифты с кириллицей: путь из окружения или один из стандартных для Linux/Windows/macOS
+FONT_CANDIDATES = [
+    (os.getenv("PDF_FONT_PATH"), os.getenv("PDF_FONT_BOLD_PATH")),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+    ("C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/arialbd.ttf"),
+    ("/Library/Fonts/Arial Unicode.ttf", None),
+]
+
+PAGE_MARGIN = 50
+ROW_HEIGHT = 15
+FONT_SIZE = 10
+ELEMENT_RADIUS = 4
+
+# Строка таблицы элементов: (id, element_id, type, name, x, y)
+ElementRow = Tuple[int, str, str, str, float, float]
+# Строка таблицы связей: (from_element_id, to_element_id, cable_section, wire_count, length)
+ConnectionRow = Tuple[int, int, float, int, Optional[float]]
+
+
+@lru_cache(maxsize=1)
+def get_fonts() -> Tuple[str, str]:
+    """Регистрирует TTF-шрифт с кириллицей один раз на процесс.
+
+    Возвращает имена обычного и жирного шрифта; если TTF не найден, используется Helvetica.
+    """
+    for regular, bold in FONT_CANDIDATES:
+        if not regular or not os.path.exists(regular):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont("WiringSans", regular))
+            if bold and os.path.exists(bold):
+                pdfmetrics.registerFont(TTFont("WiringSans-Bold", bold))
+                return "WiringSans", "WiringSans-Bold"
+            return "WiringSans", "WiringSans"
+        except Exception as e:
+            print(f"Error registering font {regular}: {e}")
+    print("Cyrillic TTF font not found, falling back to Helvetica")
+    return "Helvetica", "Helvetica-Bold"
+
+
+def _color(value: Optional[str], default=colors.black):
+    """Преобразует цвет SVG (hex или имя) в цвет ReportLab"""
+    if not value:
+        return default
+    try:
+        return colors.toColor(value)
+    except ValueError:
+        return default
+
+
+@lru_cache(maxsize=4096)
+def _char_width(char: str, font: str) -> float:
+    return pdfmetrics.stringWidth(char, font, FONT_SIZE)
+
+
+def _fit(text: str, font: str, width: float) -> str:
+    """Обрезает текст, чтобы он поместился в колонку"""
+    widths = [_char_width(char, font) for char in text]
+    if sum(widths) <= width:
+        return text
+    limit = width - _char_width("…", font)
+    total = 0.0
+    for index, char_width in enumerate(widths):
+        total += char_width
+        if total > limit:
+            return text[:index] + "…"
+    return text
+
+
+class _TableWriter:
+    """Постраничный вывод таблицы на холст"""
+
+    def __init__(self, c: canvas.Canvas, title: str, headers: Sequence[str], col_widths: Sequence[float]):
+        self.c = c
+        self.title = title
+        self.headers = headers
+        self.offsets = [PAGE_MARGIN + sum(col_widths[:i]) for i in range(len(col_widths))]
+        self.col_widths = col_widths
+        self.font, self.bold_font = get_fonts()
+        self.width, self.height = A4
+        self.y_pos = 0.0
+
+    def _start_page(self, title: str, y_start: Optional[float] = None):
+        if y_start is None:
+            self.c.setPageSize(A4)
+            y_start = self.height - PAGE_MARGIN
+        self.y_pos = y_start
+        self.c.setFont(self.bold_font, 12)
+        self.c.drawString(PAGE_MARGIN, self.y_pos, title)
+        self.y_pos -= 20
+        self.c.setFont(self.bold_font, FONT_SIZE)
+        for offset, header in zip(self.offsets, self.headers):
+            self.c.drawString(offset, self.y_pos, header)
+        self.y_pos -= ROW_HEIGHT
+        self.c.setFont(self.font, FONT_SIZE)
+
+    def write(self, rows: Iterable[Sequence[str]], y_start: Optional[float] = None):
+        """Выводит строки таблицы постранично; y_start позволяет продолжить уже начатую страницу.
+
+        Строки страницы выводятся одним текстовым объектом вместо drawString на каждую ячейку.
+        """
+        rows = iter(rows)
+        title = self.title
+        while True:
+            self._start_page(title, y_start)
+            capacity = int((self.y_pos - PAGE_MARGIN) // ROW_HEIGHT) + 1
+            chunk = list(islice(rows, capacity))
+            text = self.c.beginText()
+            text.setFont(self.font, FONT_SIZE)
+            for row in chunk:
+                for offset, width, value in zip(self.offsets, self.col_widths, row):
+                    text.setTextOrigin(offset, self.y_pos)
+                    text.textOut(_fit(value, self.font, width - 4))
+                self.y_pos -= ROW_HEIGHT
+            self.c.drawText(text)
+            self.c.showPage()
+            if len(chunk) < capacity:
+                break
+            following = next(rows, None)
+            if following is None:
+                break
+            rows = chain([following], rows)
+            title = f"{self.title} (продолжение)"
+            y_start = None
+
+
+def _draw_plan(c: canvas.Canvas, title: str, floor_plan_svg: Optional[str],
+               elements: Sequence[ElementRow], connections: Sequence[ConnectionRow]):
+    """Рисует план квартиры с условными обозначениями элементов и трассами кабелей"""
+    font, bold_font = get_fonts()
+    shapes = list(iter_plan_shapes(floor_plan_svg))
+    points = [p for shape in shapes for p in shape.points]
+    points.extend((row[4], row[5]) for row in elements)
+    box = bounds(points)
+    if box is None:
+        return
+
+    page_width, page_height = landscape(A4)
+    c.setPageSize((page_width, page_height))
+    c.setFont(bold_font, 12)
+    c.drawString(PAGE_MARGIN, page_height - PAGE_MARGIN, title)
+
+    min_x, min_y, max_x, max_y = box
+    area_width = page_width - 2 * PAGE_MARGIN
+    area_height = page_height - 2 * PAGE_MARGIN - 20
+    scale = min(area_width / max(max_x - min_x, 1e-6), area_height / max(max_y - min_y, 1e-6))
+    top = page_height - PAGE_MARGIN - 20
+
+    def tx(x: float) -> float:
+        return PAGE_MARGIN + (x - min_x) * scale
+
+    def ty(y: float) -> float:
+        # Ось Y в SVG направлена вниз, в PDF - вверх
+        return top - (y - min_y) * scale
+
+    for shape in shapes:
+        c.setLineWidth(max(shape.stroke_width * scale, 0.25))
+        c.setStrokeColor(_color(shape.stroke))
+        if shape.fill:
+            c.setFillColor(_color(shape.fill, colors.white))
+        if shape.kind == 'rect':
+            (x1, y1), (x2, y2) = shape.points
+            c.rect(tx(x1), ty(y2), (x2 - x1) * scale, (y2 - y1) * scale,
+                   stroke=1 if shape.stroke else 0, fill=1 if shape.fill else 0)
+        else:
+            path = c.beginPath()
+            path.moveTo(tx(shape.points[0][0]), ty(shape.points[0][1]))
+            for x, y in shape.points[1:]:
+                path.lineTo(tx(x), ty(y))
+            if shape.closed:
+                path.close()
+            c.drawPath(path, stroke=1 if shape.stroke else 0, fill=1 if shape.fill and shape.closed else 0)
+
+    positions: Dict[int, Tuple[float, float]] = {row[0]: (tx(row[4]), ty(row[5])) for row in elements}
+    c.setStrokeColor(colors.HexColor(CABLE_COLOR))
+    c.setLineWidth(1)
+    for from_id, to_id, *_ in connections:
+        if from_id in positions and to_id in positions:
+            c.line(*positions[from_id], *positions[to_id])
+
+    c.setFont(font, 6)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(0.5)
+    for row in elements:
+        x, y = positions[row[0]]
+        c.setFillColor(colors.HexColor(ELEMENT_COLORS.get(row[2], DEFAULT_ELEMENT_COLOR)))
+        c.circle(x, y, ELEMENT_RADIUS, stroke=1, fill=1)
+        c.setFillColor(colors.black)
+        c.drawString(x + ELEMENT_RADIUS + 1, y + ELEMENT_RADIUS, row[1])
+    c.showPage()
+
+
+def render_project_pdf(project_name: str, floor_plan_svg: Optional[str],
+                       elements: Sequence[ElementRow], connections: Sequence[ConnectionRow]) -> bytes:
+    """Формирует PDF-отчет по проекту"""
+    font, bold_font = get_fonts()
+    element_ids: Dict[int, str] = {row[0]: row[1] for row in elements}
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    c.setTitle(f"Проект: {project_name}")
+    width, height = A4
+
+    # Заголовок
+    c.setFont(bold_font, 16)
+    c.drawString(PAGE_MARGIN, height - PAGE_MARGIN, f"Проект: {project_name}")
+
+    # Таблица элементов
+    _TableWriter(c, "Элементы схемы:", ["ID", "Тип", "Название", "X", "Y"], [60, 80, 150, 50, 50]).write(
+        ((row[1], row[2], row[3], f"{row[4]:.2f}", f"{row[5]:.2f}") for row in elements),
+        y_start=height - 100,
+    )
+
+    # Таблица связей
+    _TableWriter(c, "Связи (кабели):", ["От", "К", "Сечение (мм²)", "Жил", "Длина (м)"], [60, 60, 80, 50, 80]).write(
+        (
+            element_ids.get(from_id, str(from_id)),
+            element_ids.get(to_id, str(to_id)),
+            f"{cable_section:.2f}",
+            str(wire_count),
+            f"{length:.2f}" if length else "-",
+        )
+        for from_id, to_id, cable_section, wire_count, length in connections
+    )
+
+    # План с элементами и кабелями
+    _draw_plan(c, "План расположения элементов и трасс кабелей", floor_plan_svg, elements, connections)
+
+    c.save()
+    return buffer.getvalue()
@@ -0,0 +1,55 @@
+"""
+Удаление проектов набором DELETE-запросов по таблицам вместо поштучного ORM-каскада
+"""
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+# Размер порции при фоновой очистке: короткие транзакции не блокируют БД надолго
+PURGE_CHUNK_SIZE = 10000
+
+# Порядок удаления: сначала зависимые таблицы
+CHILD_MODELS = (
+    models.BomCache, models.JournalSnapshot, models.JournalEntry, models.PanelElement, models.Connection, models.Element,
+)
+
+
+def delete_project_rows(db: Session, project_id: int):
+    """Удаляет проект и все его строки в текущей транзакции"""
+    for model in CHILD_MODELS:
+        db.execute(delete(model).where(model.project_id == project_id), execution_options={"synchronize_session": False})
+    db.execute(delete(models.Project).where(models.Project.id == project_id), execution_options={"synchronize_session": False})
+
+
+def purge_project(project_id: int, chunk_size: int = PURGE_CHUNK_SIZE):
+    """Фоновое удаление помеченного проекта порциями, каждая в своей транзакции"""
+    db = SessionLocal()
+    try:
+        for model in CHILD_MODELS:
+            while True:
+                key = model.__table__.primary_key.columns[0]
+                chunk = select(key).where(model.project_id == project_id).limit(chunk_size)
+                result = db.execute(delete(model).where(key.in_(chunk)), execution_options={"synchronize_session": False})
+                db.commit()
+                if result.rowcount < chunk_size:
+                    break
+        db.execute(delete(models.Project).where(models.Project.id == project_id), execution_options={"synchronize_session": False})
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging project {project_id}: {e}")
+    finally:
+        db.close()
+
+
+def purge_deleted_projects():
+    """Дочищает проекты, помеченные на удаление, но не удаленные (например, после перезапуска)"""
+    db = SessionLocal()
+    try:
+        project_ids = [row.id for row in db.query(models.Project.id).filter(models.Project.deleted_at.isnot(None))]
+    finally:
+        db.close()
+    for project_id in project_ids:
+        purge_project(project_id)
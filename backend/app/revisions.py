@@ -0,0 +1,20 @@
+"""
+Счетчик ревизий проекта: по нему определяется актуальность рассчитанных по проекту данных
+"""
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+def bump_revision(db: Session, project_id: int):
+    """Увеличивает ревизию проекта в текущей транзакции"""
+    db.execute(
+        update(models.Project.__table__)
+        .where(models.Project.id == project_id)
+        .values(revision=func.coalesce(models.Project.revision, 0) + 1)
+    )
+
+
+def get_revision(db: Session, project_id: int) -> int:
+    return db.execute(select(models.Project.revision).where(models.Project.id == project_id)).scalar() or 0
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 # Project schemas
@@ -19,6 +19,9 @@ class ProjectUpdate(BaseModel):
     elements_locked: Optional[bool] = None
     active_layer: Optional[str] = None
 
+class ProjectDuplicate(BaseModel):
+    name: Optional[str] = None
+
 class Project(ProjectBase):
     id: int
     created_at: datetime
@@ -81,6 +84,19 @@ class PanelElement(PanelElementBase):
     class Config:
         from_attributes = True
 
+class PanelLayoutRequest(BaseModel):
+    row_width: float = 360.0  # Ширина ряда DIN-рейки
+    gap: float = 0.0  # Зазор между модулями в ряду
+    row_gap: float = 20.0  # Зазор между рядами
+    apply: bool = False  # Сохранить рассчитанные позиции в БД
+
+class PanelLayout(BaseModel):
+    rows: int
+    width: float
+    height: float
+    elements: List[PanelElement]
+    overlaps: List[Tuple[int, int]] = []  # Перекрытия в текущей (исходной) компоновке
+
 # Connection schemas
 class ConnectionBase(BaseModel):
     from_element_id: int
@@ -104,3 +120,70 @@ class Connection(ConnectionBase):
     class Config:
         from_attributes = True
 
+
+# Cable sizing schemas
+class CableSectionRequest(BaseModel):
+    power: float  # Мощность нагрузки, Вт
+    distance: float  # Длина линии, м
+    installation_method: str = 'cable'
+    wire_count: int = 3
+
+class CableSectionResult(CableSectionRequest):
+    power: Optional[float] = None  # None, если в запросе было NaN или Infinity (см. error)
+    distance: Optional[float] = None
+    cable_section: Optional[float] = None
+    allowed_current: Optional[float] = None
+    error: Optional[str] = None
+
+# Validation schemas
+class ClearanceViolation(BaseModel):
+    first_id: int
+    second_id: int
+    distance: float
+
+class ProjectValidation(BaseModel):
+    panel_overlaps: List[Tuple[int, int]] = []  # Пары id элементов щита
+    panel_clearance_violations: List[ClearanceViolation] = []
+    element_clearance_violations: List[ClearanceViolation] = []  # Пары id элементов плана
+
+# Spreadsheet import schemas
+class ImportRowError(BaseModel):
+    sheet: str
+    row: int
+    message: str
+
+class SpreadsheetImportResult(BaseModel):
+    elements_imported: int = 0
+    connections_imported: int = 0
+    error_count: int = 0
+    errors: List[ImportRowError] = []  # Не более MAX_REPORTED_ERRORS первых ошибок
+
+# Journal schemas
+class JournalEntry(BaseModel):
+    id: int
+    project_id: int
+    operation: str
+    created_at: Optional[datetime] = None
+    undone: bool = False
+    
+    class Config:
+        from_attributes = True
+
+# Bill of materials schemas
+class CableTotal(BaseModel):
+    cable_section: float
+    wire_count: int
+    count: int
+    total_length: float  # Сумма известных длин, м
+    unmeasured_count: int  # Кабели без указанной длины
+
+class DeviceTotal(BaseModel):
+    type: str
+    count: int
+
+class BillOfMaterials(BaseModel):
+    project_ids: List[int]
+    revision: Optional[int] = None  # Ревизия проекта (только для одного проекта)
+    cables: List[CableTotal] = []
+    devices: List[DeviceTotal] = []
+    total_cable_length: float = 0.0
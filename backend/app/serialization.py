@@ -0,0 +1,50 @@
+"""
+Сериализация списков для API без загрузки ORM-объектов.
+
+Строки читаются кортежами колонок, соответствующих полям схемы ответа, и кодируются в JSON
+заранее построенным TypeAdapter (в pydantic-core, без промежуточной валидации моделей
+и jsonable_encoder).
+"""
+from typing import Any, Dict, List, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+from typing_extensions import TypedDict
+
+from . import models, schemas
+
+
+class RowSerializer:
+    """Выборка и сериализация строк таблицы по полям pydantic-схемы ответа"""
+
+    def __init__(self, schema: Type[BaseModel], model):
+        self.fields = list(schema.model_fields)
+        table = model.__table__
+        self.columns = [table.c[field] for field in self.fields]
+        # Типы колонок уже соответствуют схеме, поэтому строки только сериализуются
+        row_type = TypedDict(f"{schema.__name__}Row", {
+            name: field.annotation for name, field in schema.model_fields.items()
+        })
+        self.adapter = TypeAdapter(List[row_type])
+
+    def select(self) -> Select:
+        """SELECT колонок схемы; условия, порядок и лимиты добавляет вызывающий код"""
+        return select(*self.columns)
+
+    def rows(self, db: Session, statement: Select) -> List[Dict[str, Any]]:
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in db.execute(statement)]
+
+    def dump_json(self, rows: List[Dict[str, Any]]) -> bytes:
+        return self.adapter.dump_json(rows)
+
+    def response(self, db: Session, statement: Select) -> Response:
+        return Response(self.dump_json(self.rows(db, statement)), media_type="application/json")
+
+
+projects = RowSerializer(schemas.Project, models.Project)
+elements = RowSerializer(schemas.Element, models.Element)
+connections = RowSerializer(schemas.Connection, models.Connection)
+panel_elements = RowSerializer(schemas.PanelElement, models.PanelElement)
@@ -0,0 +1,212 @@
+"""
+Общее состояние для нескольких процессов приложения (uvicorn --workers N).
+
+Хранит значения по ключам (например, флаги включения модулей), счетчики ревизий и
+каналы сообщений об изменениях: процесс, изменивший состояние, публикует сообщение,
+остальные сравнивают счетчик канала со своим и дочитывают новые сообщения.
+
+Бэкенд выбирается переменной SHARED_STATE_URL:
+    sqlite:///./shared_state.db - файл SQLite, общий для процессов на одной машине (по умолчанию)
+    memory://                   - память процесса (для тестов и запуска в одном процессе)
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "sqlite:///./shared_state.db")
+# Сколько последних сообщений хранится в каждом канале
+MAX_MESSAGES = 1000
+
+Message = Tuple[int, Dict[str, Any]]
+
+
+class SharedState(ABC):
+    """Интерфейс общего состояния"""
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any):
+        pass
+
+    @abstractmethod
+    def get_prefix(self, prefix: str) -> Dict[str, Any]:
+        """Все значения, ключи которых начинаются с prefix"""
+        pass
+
+    @abstractmethod
+    def counter(self, name: str) -> int:
+        pass
+
+    @abstractmethod
+    def incr(self, name: str) -> int:
+        """Увеличивает счетчик и возвращает новое значение"""
+        pass
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        """Публикует сообщение; возвращает новую ревизию канала (его счетчик)"""
+        pass
+
+    @abstractmethod
+    def poll(self, channel: str, after: int) -> List[Message]:
+        """Сообщения канала с ревизией больше after, по возрастанию ревизии"""
+        pass
+
+
+class MemorySharedState(SharedState):
+    """Состояние в памяти процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._counters: Dict[str, int] = {}
+        self._messages: Dict[str, List[Message]] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._values.get(key, default)
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._values[key] = value
+
+    def get_prefix(self, prefix: str) -> Dict[str, Any]:
+        with self._lock:
+            return {key: value for key, value in self._values.items() if key.startswith(prefix)}
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def incr(self, name: str) -> int:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        with self._lock:
+            revision = self._counters.get(channel, 0) + 1
+            self._counters[channel] = revision
+            messages = self._messages.setdefault(channel, [])
+            messages.append((revision, message))
+            del messages[:-MAX_MESSAGES]
+            return revision
+
+    def poll(self, channel: str, after: int) -> List[Message]:
+        with self._lock:
+            return [item for item in self._messages.get(channel, []) if item[0] > after]
+
+
+class SQLiteSharedState(SharedState):
+    """Состояние в файле SQLite (режим WAL), по соединению на поток"""
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS shared_values (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS shared_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS shared_messages ("
+        "channel TEXT NOT NULL, revision INTEGER NOT NULL, payload TEXT NOT NULL, PRIMARY KEY (channel, revision))",
+    ]
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None - транзакции открываются явно через BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+        return connection
+
+    def _write(self, callback):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = callback(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    @staticmethod
+    def _incr(connection: sqlite3.Connection, name: str) -> int:
+        connection.execute(
+            "INSERT INTO shared_counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+        return connection.execute("SELECT value FROM shared_counters WHERE name = ?", (name,)).fetchone()[0]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute("SELECT value FROM shared_values WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any):
+        self._connection().execute(
+            "INSERT INTO shared_values (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+
+    def get_prefix(self, prefix: str) -> Dict[str, Any]:
+        rows = self._connection().execute(
+            "SELECT key, value FROM shared_values WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        return {key: json.loads(value) for key, value in rows}
+
+    def counter(self, name: str) -> int:
+        row = self._connection().execute("SELECT value FROM shared_counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, name: str) -> int:
+        return self._write(lambda connection: self._incr(connection, name))
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        def write(connection: sqlite3.Connection) -> int:
+            revision = self._incr(connection, channel)
+            connection.execute("INSERT INTO shared_messages (channel, revision, payload) VALUES (?, ?, ?)",
+                               (channel, revision, json.dumps(message)))
+            connection.execute("DELETE FROM shared_messages WHERE channel = ? AND revision <= ?",
+                               (channel, revision - MAX_MESSAGES))
+            return revision
+        return self._write(write)
+
+    def poll(self, channel: str, after: int) -> List[Message]:
+        rows = self._connection().execute(
+            "SELECT revision, payload FROM shared_messages WHERE channel = ? AND revision > ? ORDER BY revision",
+            (channel, after))
+        return [(revision, json.loads(payload)) for revision, payload in rows]
+
+
+def create_shared_state(url: str) -> SharedState:
+    if url == "memory://":
+        return MemorySharedState()
+    if url.startswith("sqlite:///"):
+        return SQLiteSharedState(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+_shared_state: Optional[SharedState] = None
+_shared_state_lock = threading.Lock()
+
+
+def get_shared_state() -> SharedState:
+    """Общее состояние процесса; создается при первом обращении по SHARED_STATE_URL"""
+    global _shared_state
+    with _shared_state_lock:
+        if _shared_state is None:
+            _shared_state = create_shared_state(SHARED_STATE_URL)
+        return _shared_state
+
+
+def set_shared_state(state: SharedState):
+    """Подменяет бэкенд (например, на MemorySharedState в тестах)"""
+    global _shared_state
+    with _shared_state_lock:
+        _shared_state = state
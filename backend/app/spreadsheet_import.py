@@ -0,0 +1,237 @@
+"""
+Импорт элементов и связей из таблиц (.xlsx или CSV) в формате листов export_excel
+"""
+import ast
+import csv
+import io
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Sequence
+
+import openpyxl
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import journal, models
+from .revisions import bump_revision
+
+ELEMENTS_SHEET = "Элементы"
+CONNECTIONS_SHEET = "Связи"
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+# Заголовки колонок -> поля модели
+ELEMENT_COLUMNS = {
+    "ID": "element_id",
+    "Тип": "type",
+    "Название": "name",
+    "X": "x",
+    "Y": "y",
+    "Свойства": "properties",
+}
+CONNECTION_COLUMNS = {
+    "От элемента": "from_element_id",
+    "К элементу": "to_element_id",
+    "Сечение (мм²)": "cable_section",
+    "Количество жил": "wire_count",
+    "Длина (м)": "length",
+}
+REQUIRED_ELEMENT_FIELDS = ["element_id", "type", "name", "x", "y"]
+REQUIRED_CONNECTION_FIELDS = ["from_element_id", "to_element_id", "cable_section", "wire_count"]
+
+
+class SpreadsheetError(ValueError):
+    """Ошибка структуры импортируемого файла"""
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).strip().replace(",", "."))
+
+
+def _properties(value: Any) -> Dict[str, Any]:
+    text = _text(value)
+    if not text:
+        return {}
+    try:
+        try:
+            result = json.loads(text)
+        except ValueError:
+            # export_excel пишет свойства как str(dict)
+            result = ast.literal_eval(text)
+    except (RecursionError, MemoryError):
+        # Слишком глубокая вложенность: ошибка строки, а не всего импорта
+        raise ValueError("properties are nested too deeply")
+    if not isinstance(result, dict):
+        raise ValueError("properties must be a dictionary")
+    return result
+
+
+def _cell(row: Sequence[Any], positions: Dict[str, int], field: str) -> Any:
+    index = positions.get(field)
+    if index is None or index >= len(row):
+        return None
+    return row[index]
+
+
+def _map_header(header: Sequence[Any], columns: Dict[str, str], required: List[str], sheet: str) -> Dict[str, int]:
+    """Индексы колонок по заголовкам листа"""
+    positions = {}
+    for index, title in enumerate(header):
+        field = columns.get(_text(title))
+        if field:
+            positions[field] = index
+    missing = [title for title, field in columns.items() if field in required and field not in positions]
+    if missing:
+        raise SpreadsheetError(f"Sheet '{sheet}': missing columns {', '.join(missing)}")
+    return positions
+
+
+class SpreadsheetImporter:
+    """Пакетный импорт строк в проект с отчетом об ошибках по строкам"""
+
+    def __init__(self, db: Session, project_id: int):
+        self.db = db
+        self.project_id = project_id
+        # Пользовательский element_id -> id в БД (существующие и импортированные элементы)
+        self.element_ids: Dict[str, int] = {
+            row.element_id: row.id
+            for row in db.execute(
+                select(models.Element.element_id, models.Element.id).where(models.Element.project_id == project_id)
+            )
+        }
+        self.next_element_id = journal.max_issued_id(db, models.Element) + 1
+        self.elements_imported = 0
+        self.connections_imported = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def _error(self, sheet: str, row: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"sheet": sheet, "row": row, "message": message})
+
+    def _insert(self, model, batch: List[Dict[str, Any]]):
+        if batch:
+            self.db.execute(insert(model.__table__), batch)
+            bump_revision(self.db, self.project_id)
+
+    def import_elements(self, rows: Iterable[Sequence[Any]], sheet: str = ELEMENTS_SHEET):
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = _map_header(header, ELEMENT_COLUMNS, REQUIRED_ELEMENT_FIELDS, sheet)
+        batch: List[Dict[str, Any]] = []
+        for row_number, row in enumerate(rows, start=2):
+            if not any(_text(value) for value in row):
+                continue
+            try:
+                element_id = _text(_cell(row, positions, "element_id"))
+                if not element_id:
+                    raise ValueError("empty element ID")
+                if element_id in self.element_ids:
+                    raise ValueError(f"element '{element_id}' already exists")
+                record = {
+                    "id": self.next_element_id,
+                    "project_id": self.project_id,
+                    "element_id": element_id,
+                    "type": _text(_cell(row, positions, "type")),
+                    "name": _text(_cell(row, positions, "name")),
+                    "x": _number(_cell(row, positions, "x")),
+                    "y": _number(_cell(row, positions, "y")),
+                    "properties": _properties(_cell(row, positions, "properties")),
+                }
+                if not record["type"] or not record["name"]:
+                    raise ValueError("type and name are required")
+            except (ValueError, SyntaxError, TypeError) as e:
+                self._error(sheet, row_number, str(e))
+                continue
+            self.element_ids[element_id] = self.next_element_id
+            self.next_element_id += 1
+            batch.append(record)
+            if len(batch) >= BATCH_SIZE:
+                self._insert(models.Element, batch)
+                self.elements_imported += len(batch)
+                batch = []
+        self._insert(models.Element, batch)
+        self.elements_imported += len(batch)
+
+    def import_connections(self, rows: Iterable[Sequence[Any]], sheet: str = CONNECTIONS_SHEET):
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = _map_header(header, CONNECTION_COLUMNS, REQUIRED_CONNECTION_FIELDS, sheet)
+        batch: List[Dict[str, Any]] = []
+        for row_number, row in enumerate(rows, start=2):
+            if not any(_text(value) for value in row):
+                continue
+            try:
+                ids = []
+                for field in ("from_element_id", "to_element_id"):
+                    element_id = _text(_cell(row, positions, field))
+                    if element_id not in self.element_ids:
+                        raise ValueError(f"element '{element_id}' not found")
+                    ids.append(self.element_ids[element_id])
+                length = _text(_cell(row, positions, "length"))
+                record = {
+                    "project_id": self.project_id,
+                    "from_element_id": ids[0],
+                    "to_element_id": ids[1],
+                    "cable_section": _number(_cell(row, positions, "cable_section")),
+                    "wire_count": int(_number(_cell(row, positions, "wire_count"))),
+                    "length": _number(length) if length else None,
+                }
+            except (ValueError, TypeError) as e:
+                self._error(sheet, row_number, str(e))
+                continue
+            batch.append(record)
+            if len(batch) >= BATCH_SIZE:
+                self._insert(models.Connection, batch)
+                self.connections_imported += len(batch)
+                batch = []
+        self._insert(models.Connection, batch)
+        self.connections_imported += len(batch)
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "elements_imported": self.elements_imported,
+            "connections_imported": self.connections_imported,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def import_workbook(importer: SpreadsheetImporter, fileobj: BinaryIO):
+    """Потоковый импорт листов "Элементы" и "Связи" из .xlsx"""
+    try:
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise SpreadsheetError(f"Cannot read workbook: {e}")
+    try:
+        if ELEMENTS_SHEET not in workbook.sheetnames and CONNECTIONS_SHEET not in workbook.sheetnames:
+            raise SpreadsheetError(f"Workbook has no '{ELEMENTS_SHEET}' or '{CONNECTIONS_SHEET}' sheet")
+        if ELEMENTS_SHEET in workbook.sheetnames:
+            importer.import_elements(workbook[ELEMENTS_SHEET].iter_rows(values_only=True))
+        if CONNECTIONS_SHEET in workbook.sheetnames:
+            importer.import_connections(workbook[CONNECTIONS_SHEET].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def iter_csv_rows(fileobj: BinaryIO) -> Iterator[List[str]]:
+    """Потоковое чтение CSV (UTF-8, разделитель ',' или ';' определяется по заголовку)"""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    first_line = text.readline()
+    delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+    yield next(csv.reader([first_line], delimiter=delimiter))
+    yield from csv.reader(text, delimiter=delimiter)
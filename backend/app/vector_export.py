@@ -0,0 +1,267 @@
+"""
+Экспорт чертежа проекта в SVG и DXF: план квартиры, трассы кабелей и условные обозначения элементов.
+
+Документ формируется потоково, запись за записью: строки элементов и связей читаются из БД
+порциями, план разбирается итеративно. Обозначение каждого типа элемента описывается
+один раз (defs в SVG, BLOCK в DXF) и далее только вставляется по координатам.
+"""
+import re
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .floor_plan import CABLE_COLOR, DEFAULT_ELEMENT_COLOR, ELEMENT_COLORS, PlanShape, bounds, iter_plan_shapes
+
+BATCH_SIZE = 5000
+CHUNK_SIZE = 1 << 16
+SYMBOL_RADIUS = 10.0  # Радиус обозначения элемента в единицах плана
+LABEL_HEIGHT = 8.0
+CABLE_WIDTH = 2.0
+
+# Номера цветов AutoCAD (ACI) для DXF, в соответствии с ELEMENT_COLORS
+ELEMENT_ACI = {
+    'socket': 5,
+    'switch': 3,
+    'lamp': 2,
+    'equipment': 6,
+    'panel': 1,
+}
+DEFAULT_ELEMENT_ACI = 8
+CABLE_ACI = 30
+# Слои DXF: (имя, цвет ACI)
+DXF_LAYERS = [("PLAN", 8), ("CABLES", CABLE_ACI), ("ELEMENTS", 7), ("LABELS", 7)]
+
+Extent = Tuple[float, float, float, float]
+
+
+def _num(value: float) -> str:
+    text = f"{value:.3f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _chunked(parts: Iterable[str], encoding: str) -> Iterator[bytes]:
+    """Объединяет мелкие фрагменты документа в блоки по CHUNK_SIZE"""
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode(encoding)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode(encoding)
+
+
+def _symbol_names(types: Iterable[str], prefix: str, transform: Callable[[str], str] = str) -> Dict[Optional[str], str]:
+    """Уникальные имена обозначений (id в SVG, имя блока в DXF) по типам элементов.
+
+    Под ключом None - обобщенное обозначение для типов, появившихся уже во время выгрузки.
+    """
+    names: Dict[Optional[str], str] = {None: prefix + transform("default")}
+    used = {names[None]}
+    for element_type in types:
+        name = prefix + transform(re.sub(r'[^0-9A-Za-z_-]', '_', element_type))
+        candidate, index = name, 1
+        while candidate in used:
+            index += 1
+            candidate = f"{name}_{index}"
+        used.add(candidate)
+        names[element_type] = candidate
+    return names
+
+
+def _element_types(db: Session, project_id: int) -> Iterable[str]:
+    element = models.Element.__table__
+    return db.execute(
+        select(element.c.type).where(element.c.project_id == project_id).distinct().order_by(element.c.type)
+    ).scalars().all()
+
+
+def _elements(db: Session, project_id: int):
+    """Строки (element_id, type, x, y) по возрастанию id"""
+    element = models.Element.__table__
+    return db.execute(
+        select(element.c.element_id, element.c.type, element.c.x, element.c.y)
+        .where(element.c.project_id == project_id)
+        .order_by(element.c.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+
+
+def _cables(db: Session, project_id: int):
+    """Строки (cable_section, wire_count, x1, y1, x2, y2) с координатами концов связи"""
+    connection = models.Connection.__table__
+    source = models.Element.__table__.alias("source")
+    target = models.Element.__table__.alias("target")
+    return db.execute(
+        select(connection.c.cable_section, connection.c.wire_count, source.c.x, source.c.y, target.c.x, target.c.y)
+        .join(source, source.c.id == connection.c.from_element_id)
+        .join(target, target.c.id == connection.c.to_element_id)
+        .where(connection.c.project_id == project_id)
+        .order_by(connection.c.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+
+
+def _extent(db: Session, project: models.Project) -> Extent:
+    """Габариты чертежа: план и элементы с запасом на обозначения"""
+    element = models.Element.__table__
+    element_box = db.execute(
+        select(func.min(element.c.x), func.min(element.c.y), func.max(element.c.x), func.max(element.c.y))
+        .where(element.c.project_id == project.id)
+    ).one()
+    plan_box = bounds(point for shape in iter_plan_shapes(project.floor_plan_svg) for point in shape.points)
+    corners = []
+    if plan_box:
+        corners.extend([plan_box[:2], plan_box[2:]])
+    if element_box[0] is not None:
+        corners.extend([element_box[:2], element_box[2:]])
+    box = bounds(corners)
+    if box is None:
+        return 0.0, 0.0, 100.0, 100.0
+    margin = 2 * SYMBOL_RADIUS
+    return box[0] - margin, box[1] - margin, box[2] + margin, box[3] + margin
+
+
+def _svg_shape(shape: PlanShape) -> str:
+    stroke = f' stroke={quoteattr(shape.stroke)} stroke-width="{_num(shape.stroke_width)}"' if shape.stroke else ''
+    if shape.kind == 'rect':
+        (x1, y1), (x2, y2) = shape.points
+        fill = quoteattr(shape.fill or 'none')
+        return (f'<rect x="{_num(x1)}" y="{_num(y1)}" width="{_num(x2 - x1)}" height="{_num(y2 - y1)}" '
+                f'fill={fill}{stroke}/>\n')
+    d = "M" + " L".join(f"{_num(x)} {_num(y)}" for x, y in shape.points) + (" Z" if shape.closed else "")
+    fill = quoteattr(shape.fill if shape.fill and shape.closed else 'none')
+    return f'<path d="{d}" fill={fill}{stroke}/>\n'
+
+
+def iter_svg(db: Session, project: models.Project, labels: bool = True) -> Iterator[str]:
+    """Фрагменты SVG-документа проекта"""
+    min_x, min_y, max_x, max_y = _extent(db, project)
+    width, height = max_x - min_x, max_y - min_y
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+           f'viewBox="{_num(min_x)} {_num(min_y)} {_num(width)} {_num(height)}" '
+           f'width="{_num(width)}" height="{_num(height)}">\n')
+    yield f'<title>{escape(project.name)}</title>\n'
+
+    symbols = _symbol_names(_element_types(db, project.id), "element-")
+    yield '<defs>\n'
+    for element_type, symbol_id in symbols.items():
+        color = ELEMENT_COLORS.get(element_type, DEFAULT_ELEMENT_COLOR)
+        letter = escape((element_type or "?")[:1].upper())
+        yield (f'<g id="{symbol_id}"><circle r="{_num(SYMBOL_RADIUS)}" fill="{color}" stroke="#000" stroke-width="1"/>'
+               f'<text y="{_num(SYMBOL_RADIUS * 0.35)}" font-size="{_num(SYMBOL_RADIUS)}" text-anchor="middle" '
+               f'fill="#fff">{letter}</text></g>\n')
+    yield '</defs>\n'
+
+    yield '<g id="plan">\n'
+    for shape in iter_plan_shapes(project.floor_plan_svg):
+        yield _svg_shape(shape)
+    yield '</g>\n'
+
+    yield f'<g id="cables" fill="none" stroke="{CABLE_COLOR}" stroke-width="{_num(CABLE_WIDTH)}">\n'
+    for section, wire_count, x1, y1, x2, y2 in _cables(db, project.id):
+        yield (f'<polyline points="{_num(x1)},{_num(y1)} {_num(x2)},{_num(y2)}" '
+               f'data-cable="{wire_count}x{_num(section)}"/>\n')
+    yield '</g>\n'
+
+    yield f'<g id="elements" font-family="sans-serif" font-size="{_num(LABEL_HEIGHT)}">\n'
+    label_dx = SYMBOL_RADIUS + 2
+    for element_id, element_type, x, y in _elements(db, project.id):
+        symbol_id = symbols.get(element_type, symbols[None])
+        yield f'<use xlink:href="#{symbol_id}" x="{_num(x)}" y="{_num(y)}"/>\n'
+        if labels:
+            yield f'<text x="{_num(x + label_dx)}" y="{_num(y - SYMBOL_RADIUS)}">{escape(element_id)}</text>\n'
+    yield '</g>\n</svg>\n'
+
+
+def _dxf(*pairs) -> str:
+    """Пары "код группы - значение" DXF"""
+    return "".join(f"{pairs[i]}\n{pairs[i + 1]}\n" for i in range(0, len(pairs), 2))
+
+
+def _dxf_text(value: str) -> str:
+    # DXF R12 - однобайтовый формат, символы вне ASCII записываются как \U+XXXX
+    value = " ".join(value.split())
+    return "".join(char if ord(char) < 128 else f"\\U+{ord(char):04X}" for char in value)
+
+
+def _dxf_polyline(layer: str, points: Iterable[Tuple[float, float]], closed: bool) -> str:
+    # Ось Y в SVG направлена вниз, в DXF - вверх
+    parts = [_dxf(0, "POLYLINE", 8, layer, 66, 1, 70, 1 if closed else 0, 10, 0, 20, 0, 30, 0)]
+    parts.extend(_dxf(0, "VERTEX", 8, layer, 10, _num(x), 20, _num(-y), 30, 0) for x, y in points)
+    parts.append(_dxf(0, "SEQEND", 8, layer))
+    return "".join(parts)
+
+
+def iter_dxf(db: Session, project: models.Project, labels: bool = True) -> Iterator[str]:
+    """Фрагменты DXF-документа проекта (ASCII, версия R12)"""
+    min_x, min_y, max_x, max_y = _extent(db, project)
+    yield _dxf(0, "SECTION", 2, "HEADER",
+               9, "$ACADVER", 1, "AC1009",
+               9, "$EXTMIN", 10, _num(min_x), 20, _num(-max_y), 30, 0,
+               9, "$EXTMAX", 10, _num(max_x), 20, _num(-min_y), 30, 0,
+               0, "ENDSEC")
+
+    yield _dxf(0, "SECTION", 2, "TABLES",
+               0, "TABLE", 2, "LTYPE", 70, 1,
+               0, "LTYPE", 2, "CONTINUOUS", 70, 0, 3, "Solid line", 72, 65, 73, 0, 40, 0.0,
+               0, "ENDTAB",
+               0, "TABLE", 2, "LAYER", 70, len(DXF_LAYERS))
+    for name, color in DXF_LAYERS:
+        yield _dxf(0, "LAYER", 2, name, 70, 0, 62, color, 6, "CONTINUOUS")
+    yield _dxf(0, "ENDTAB", 0, "ENDSEC")
+
+    symbols = _symbol_names(_element_types(db, project.id), "EL_", str.upper)
+    yield _dxf(0, "SECTION", 2, "BLOCKS")
+    for element_type, block in symbols.items():
+        color = ELEMENT_ACI.get(element_type, DEFAULT_ELEMENT_ACI)
+        yield _dxf(0, "BLOCK", 8, "0", 2, block, 70, 0, 10, 0, 20, 0, 30, 0, 3, block,
+                   0, "CIRCLE", 8, "0", 62, color, 10, 0, 20, 0, 30, 0, 40, _num(SYMBOL_RADIUS),
+                   0, "TEXT", 8, "0", 62, color, 10, 0, 20, 0, 30, 0, 40, _num(SYMBOL_RADIUS),
+                   1, _dxf_text((element_type or "?")[:1].upper()) or "?", 72, 1, 73, 2, 11, 0, 21, 0, 31, 0,
+                   0, "ENDBLK", 8, "0")
+    yield _dxf(0, "ENDSEC")
+
+    yield _dxf(0, "SECTION", 2, "ENTITIES")
+    for shape in iter_plan_shapes(project.floor_plan_svg):
+        points = shape.points
+        if shape.kind == 'rect':
+            (x1, y1), (x2, y2) = points
+            points = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+        yield _dxf_polyline("PLAN", points, shape.closed)
+    for section, wire_count, x1, y1, x2, y2 in _cables(db, project.id):
+        yield _dxf_polyline("CABLES", [(x1, y1), (x2, y2)], False)
+    for element_id, element_type, x, y in _elements(db, project.id):
+        block = symbols.get(element_type, symbols[None])
+        yield _dxf(0, "INSERT", 8, "ELEMENTS", 2, block, 10, _num(x), 20, _num(-y), 30, 0)
+        if labels:
+            yield _dxf(0, "TEXT", 8, "LABELS", 10, _num(x + SYMBOL_RADIUS + 2), 20, _num(-y + SYMBOL_RADIUS), 30, 0,
+                       40, _num(LABEL_HEIGHT), 1, _dxf_text(element_id))
+    yield _dxf(0, "ENDSEC", 0, "EOF")
+
+
+def _stream(project_id: int, writer: Callable[..., Iterator[str]], encoding: str, labels: bool) -> Iterator[bytes]:
+    # Собственная сессия: генератор выполняется уже после выхода из обработчика запроса
+    db = SessionLocal()
+    try:
+        project = db.query(models.Project).filter(models.Project.id == project_id).first()
+        yield from _chunked(writer(db, project, labels), encoding)
+    finally:
+        db.close()
+
+
+def stream_svg(project_id: int, labels: bool = True) -> Iterator[bytes]:
+    """Потоково формирует SVG-чертеж проекта"""
+    return _stream(project_id, iter_svg, "utf-8", labels)
+
+
+def stream_dxf(project_id: int, labels: bool = True) -> Iterator[bytes]:
+    """Потоково формирует DXF-чертеж проекта"""
+    return _stream(project_id, iter_dxf, "ascii", labels)
@@ -0,0 +1,96 @@
+"""
+Генератор синтетических проектов для бенчмарков
+"""
+import random
+from typing import Optional
+from sqlalchemy.orm import Session
+from app import models
+
+ELEMENT_TYPES = ['socket', 'switch', 'lamp', 'equipment', 'panel']
+ROOM_TYPES = ['room_kitchen', 'room_living', 'room_bedroom', 'room_bedroom2', 'room_bathroom', 'room_corridor']
+BATCH_SIZE = 5000
+
+
+def generate_floor_plan_svg(rooms: int, rng: random.Random) -> str:
+    """SVG плана в формате редактора: сетка комнат и стены по их периметру"""
+    columns = max(int(rooms ** 0.5), 1)
+    parts = []
+    for i in range(rooms):
+        x, y = (i % columns) * 400, (i // columns) * 300
+        parts.append(
+            f'<rect x="{x}" y="{y}" width="400" height="300" fill="#A5D6A7" stroke="#666" '
+            f'stroke-width="2" data-type="{rng.choice(ROOM_TYPES)}" data-id="room-{i}" />'
+        )
+        parts.append(
+            f'<path d="M {x} {y} L {x + 400} {y} L {x + 400} {y + 300}" fill="none" stroke="#333" '
+            f'stroke-width="3" data-type="wall" data-id="wall-{i}" />'
+        )
+    return f'<svg xmlns="http://www.w3.org/2000/svg">{"".join(parts)}</svg>'
+
+
+def generate_project(db: Session, elements: int, connections: Optional[int] = None,
+                     panel_elements: Optional[int] = None, seed: int = 0) -> int:
+    """Создает проект с заданным количеством элементов, связей и модулей щита.
+
+    По умолчанию связей столько же, сколько элементов, а в щите - каждый десятый элемент.
+    Возвращает id проекта.
+    """
+    rng = random.Random(seed)
+    if connections is None:
+        connections = elements
+    if panel_elements is None:
+        panel_elements = max(elements // 10, 1) if elements else 0
+
+    rooms = max(elements // 20, 1)
+    columns = max(int(rooms ** 0.5), 1)
+    width, height = columns * 400, ((rooms - 1) // columns + 1) * 300
+
+    project = models.Project(
+        name=f"Benchmark {elements}",
+        floor_plan_svg=generate_floor_plan_svg(rooms, rng),
+    )
+    db.add(project)
+    db.flush()
+
+    for start in range(0, elements, BATCH_SIZE):
+        db.bulk_insert_mappings(models.Element, [
+            {
+                "project_id": project.id,
+                "element_id": f"E{i}",
+                "type": rng.choice(ELEMENT_TYPES),
+                "name": f"Элемент {i}",
+                "x": rng.uniform(0, width),
+                "y": rng.uniform(0, height),
+                "properties": {"power": rng.choice([100, 500, 1000, 2000, 3500])},
+            }
+            for i in range(start, min(start + BATCH_SIZE, elements))
+        ])
+    element_ids = [row.id for row in db.query(models.Element.id).filter(models.Element.project_id == project.id)]
+
+    if element_ids:
+        for start in range(0, connections, BATCH_SIZE):
+            db.bulk_insert_mappings(models.Connection, [
+                {
+                    "project_id": project.id,
+                    "from_element_id": rng.choice(element_ids),
+                    "to_element_id": rng.choice(element_ids),
+                    "cable_section": rng.choice([1.5, 2.5, 4.0, 6.0]),
+                    "wire_count": rng.choice([2, 3, 5]),
+                    "length": round(rng.uniform(1, 30), 2),
+                }
+                for _ in range(start, min(start + BATCH_SIZE, connections))
+            ])
+        db.bulk_insert_mappings(models.PanelElement, [
+            {
+                "project_id": project.id,
+                "element_id": element_id,
+                "position_x": rng.uniform(0, 360),
+                "position_y": rng.uniform(0, 600),
+                "width": rng.choice([18, 36, 54, 72]),
+                "height": 90,
+            }
+            for element_id in rng.sample(element_ids, min(panel_elements, len(element_ids)))
+        ])
+
+    db.commit()
+    return project.id
@@ -0,0 +1,198 @@
+"""
+Бенчмарки API на синтетических проектах разного размера.
+
+Запуск из каталога backend:
+    python -m benchmarks.run --sizes 10,1000,100000 --output results.json
+    python -m benchmarks.run --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_SIZES = "10,100,1000,10000,100000"
+DEFAULT_OPERATIONS = [
+    "list_projects",
+    "list_elements",
+    "list_connections",
+    "bulk_edit_elements",
+    "export_pdf",
+    "export_excel",
+    "cable_sizing",
+    "module_cable_length",
+    "panel_layout",
+    "validation",
+    "bom",
+]
+BULK_EDIT_COUNT = 100
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Выполняет операцию repeat раз и возвращает минимальное и медианное время"""
+    timings = []
+    status = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        status = func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "repeat": repeat,
+        "status": status,
+    }
+
+
+def build_operations(client, project_id: int, size: int) -> Dict[str, Callable[[], Any]]:
+    from app.api.modules import module_manager
+    from app.database import SessionLocal
+    from app import models
+
+    element_ids = [e["id"] for e in client.get(f"/api/elements/project/{project_id}").json()[:BULK_EDIT_COUNT]]
+
+    def bulk_edit_elements():
+        status = 200
+        for i, element_id in enumerate(element_ids):
+            response = client.put(f"/api/elements/{element_id}", json={"x": float(i), "y": float(i)})
+            status = max(status, response.status_code)
+        return status
+
+    def cable_sizing():
+        payload = [{"power": 100.0 + i % 3500, "distance": 1.0 + i % 40} for i in range(size)]
+        return client.post("/api/cables/suggest-section", json=payload).status_code
+
+    def module_cable_length():
+        db = SessionLocal()
+        try:
+            positions = {
+                row.id: {"x": row.x, "y": row.y}
+                for row in db.query(models.Element.id, models.Element.x, models.Element.y)
+                .filter(models.Element.project_id == project_id)
+            }
+            with module_manager.use_module("example_module") as module:
+                for row in db.query(models.Connection.from_element_id, models.Connection.to_element_id) \
+                        .filter(models.Connection.project_id == project_id):
+                    module.calculate_cable_length(positions[row.from_element_id], positions[row.to_element_id])
+        finally:
+            db.close()
+        return 200
+
+    return {
+        "list_projects": lambda: client.get("/api/projects/").status_code,
+        "list_elements": lambda: client.get(f"/api/elements/project/{project_id}").status_code,
+        "list_connections": lambda: client.get(f"/api/connections/project/{project_id}").status_code,
+        "bulk_edit_elements": bulk_edit_elements,
+        "export_pdf": lambda: client.get(f"/api/export/pdf/{project_id}").status_code,
+        "export_excel": lambda: client.get(f"/api/export/excel/{project_id}").status_code,
+        "cable_sizing": cable_sizing,
+        "module_cable_length": module_cable_length,
+        "panel_layout": lambda: client.post(f"/api/panel/project/{project_id}/layout", json={}).status_code,
+        "validation": lambda: client.get(f"/api/validation/project/{project_id}").status_code,
+        "bom": lambda: client.get(f"/api/bom/project/{project_id}").status_code,
+    }
+
+
+def run(sizes: List[int], operations: List[str], repeat: int) -> Dict[str, Any]:
+    # Импорт приложения только после настройки DATABASE_URL
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.database import SessionLocal
+    from .generator import generate_project
+
+    results = []
+    with TestClient(app) as client:
+        for size in sizes:
+            db = SessionLocal()
+            try:
+                start = time.perf_counter()
+                project_id = generate_project(db, size)
+                print(f"[{size}] generated project {project_id} in {time.perf_counter() - start:.2f}s")
+            finally:
+                db.close()
+
+            available = build_operations(client, project_id, size)
+            for name in operations:
+                result = measure(available[name], repeat)
+                result.update({"operation": name, "size": size})
+                results.append(result)
+                print(f"[{size}] {name}: {result['median_seconds'] * 1000:.1f} ms (status {result['status']})")
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Сравнивает результаты с эталоном; возвращает число регрессий"""
+    base = {(r["operation"], r["size"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'}:")
+    for result in current["results"]:
+        previous = base.get((result["operation"], result["size"]))
+        if previous is None or not previous["median_seconds"]:
+            continue
+        ratio = result["median_seconds"] / previous["median_seconds"]
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  REGRESSION"
+            regressions += 1
+        print(f"  {result['operation']:<22} {result['size']:>7}: {ratio:6.2f}x{mark}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Wiring Designer API benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Project sizes (number of elements), comma separated")
+    parser.add_argument("--operations", default=",".join(DEFAULT_OPERATIONS), help="Operations to run, comma separated")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per operation")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown ratio reported as regression")
+    parser.add_argument("--database", help="Database URL (a temporary SQLite file by default)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    operations = [name for name in args.operations.split(",") if name]
+    unknown = set(operations) - set(DEFAULT_OPERATIONS)
+    if unknown:
+        parser.error(f"Unknown operations: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = args.database or f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"
+        os.environ["SHARED_STATE_URL"] = "memory://"
+        report = run(sizes, operations, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())